@@ -0,0 +1,72 @@
+import json
+import subprocess
+import sys
+import warnings
+import numpy as np
+from pathlib import Path
+from src.scripts.model_artifact import artifact_path, save_artifact
+from src.utils.load_file import load
+
+MODEL_NAME = 'RandomForestRegressor'
+
+# Load and score one row in a fresh interpreter (after pandas is imported), so import and page-in costs are included
+LOAD_SNIPPETS = {
+    'pkl': (
+        "from src.utils.load_file import load\n"
+        "model = load('RandomForestRegressor.pkl', 'pkl')\n"
+    ),
+    'artifact (float64)': (
+        "from src.scripts.model_artifact import load_artifact\n"
+        "model = load_artifact('RandomForestRegressor')\n"
+    ),
+    'artifact (float32)': (
+        "from src.scripts.model_artifact import load_artifact\n"
+        "model = load_artifact('RandomForestRegressor_float32')\n"
+    ),
+}
+
+QUERY = (
+    "import pandas as pd\n"
+    "query = pd.DataFrame({'airline': ['Multiple Carriers'], 'date_of_journey': ['2019-05-21'], 'source': ['Delhi'],"
+    " 'destination': ['Cochin'], 'dep_time': ['02:15:00'], 'arrival_time': ['11:50:00'],"
+    " 'duration_minute': [575], 'total_stops': [1]})\n"
+)
+
+def size_of(path):
+    path = Path(path)
+    if path.is_dir():
+        return sum(file.stat().st_size for file in path.iterdir())
+    return path.stat().st_size
+
+def cold_start(snippet):
+    code = (
+        "import json, time, warnings\n"
+        "warnings.simplefilter('ignore')\n"
+        + QUERY +
+        "start = time.perf_counter()\n"
+        + snippet +
+        "loaded = time.perf_counter()\n"
+        "model.predict(query)\n"
+        "print(json.dumps({'load': loaded - start, 'first_prediction': time.perf_counter() - loaded}))\n"
+    )
+    return json.loads(subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout)
+
+def main():
+    warnings.simplefilter('ignore')
+    pipeline = load(f'{MODEL_NAME}.pkl', 'pkl')
+    save_artifact(pipeline, MODEL_NAME)
+    save_artifact(pipeline, f'{MODEL_NAME}_float32', dtype=np.float32)
+
+    sizes = {
+        'pkl': size_of(artifact_path(MODEL_NAME).with_name(f'{MODEL_NAME}.pkl')),
+        'artifact (float64)': size_of(artifact_path(MODEL_NAME)),
+        'artifact (float32)': size_of(artifact_path(f'{MODEL_NAME}_float32')),
+    }
+
+    print(f"{'format':>20} {'size (MB)':>10} {'import + load (s)':>18} {'first prediction (ms)':>22}")
+    for name, snippet in LOAD_SNIPPETS.items():
+        timings = cold_start(snippet)
+        print(f"{name:>20} {sizes[name] / 1e6:>10.1f} {timings['load']:>18.3f} {timings['first_prediction'] * 1e3:>22.2f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from benchmarks.run_benchmarks import RESULTS_FILE, run_metadata
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+QUERY = {
+    'airline': 'Multiple Carriers', 'date_of_journey': '2019-05-21', 'source': 'Delhi', 'destination': 'Cochin',
+    'dep_time': '02:15:00', 'arrival_time': '11:50:00', 'duration_minute': 575, 'total_stops': 1
+}
+
+# Each command runs in a fresh interpreter, so its wall time is the cold-start cost
+COMMANDS = {
+    'import.main': [sys.executable, '-c', 'import main'],
+    'import.cli': [sys.executable, '-c', 'import cli'],
+    'predict.main_test': [sys.executable, '-W', 'ignore', '-c', 'from main import test; test()'],
+    'predict.cli': [sys.executable, 'cli.py', 'predict', '--query', json.dumps(QUERY)],
+}
+
+def cold_start_seconds(command, repeats):
+    """
+    Get the median wall time of a command run in a fresh interpreter.
+    """
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=PROJECT_ROOT, check=True, capture_output=True)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure import time and cold-start prediction latency.')
+    parser.add_argument('--repeats', type=int, default=5, help='Runs per command; the median is reported')
+    parser.add_argument('--output', type=Path, default=RESULTS_FILE, help='JSON lines file the run is appended to')
+    args = parser.parse_args()
+
+    run = run_metadata()
+    run['results'] = []
+    for name, command in COMMANDS.items():
+        result = {'stage': name, 'wall_seconds': cold_start_seconds(command, args.repeats), 'repeats': args.repeats}
+        run['results'].append(result)
+        print(json.dumps(result))
+
+    with open(args.output, 'a') as file:
+        file.write(json.dumps(run) + '\n')
+    print(f"Results appended to '{args.output}'.")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,40 @@
+import warnings
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+from main import convert_to_time
+from src.scripts.data_cleaning import clean_df
+from src.scripts.model_training import column_transformer
+from src.utils.load_file import load
+from src.utils.split_dataset import split
+
+# Replication factors of data/flight_price.csv to benchmark
+SCALES = [1, 10, 100]
+
+def memory_mb(df):
+    return df.memory_usage(deep=True).sum() / 1e6
+
+def transformed(df):
+    """
+    Split, convert the times and run the column_transformer, as train() does.
+    """
+    X_train, y_train, X_val, _, _, _ = split(df)
+    convert_to_time(X_train, X_val)
+    return clone(column_transformer).fit(X_train, y_train).transform(X_val)
+
+def main():
+    warnings.simplefilter('ignore')
+    raw = load('flight_price.csv', 'csv')
+
+    print(f"{'rows':>10} {'default (MB)':>13} {'compact (MB)':>13} {'ratio':>6} {'identical features':>19}")
+    for scale in SCALES:
+        # Shift each copy's price so the copies survive drop_duplicates
+        scaled = pd.concat([raw.assign(Price=raw['Price'] + i) for i in range(scale)], ignore_index=True)
+        default = clean_df(scaled.copy())
+        compact = clean_df(scaled.copy(), compact=True)
+        identical = np.array_equal(transformed(default), transformed(compact)) if scale == 1 else '-'
+        print(f"{len(default):>10} {memory_mb(default):>13.2f} {memory_mb(compact):>13.2f} "
+              f"{memory_mb(default) / memory_mb(compact):>5.1f}x {str(identical):>19}")
+
+if __name__ == '__main__':
+    main()
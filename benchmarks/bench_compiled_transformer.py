@@ -0,0 +1,32 @@
+import time
+import warnings
+from main import MODEL_NAME
+from src.scripts.compiled_transformer import CompiledTransformer, compare_with_sklearn
+from src.utils.load_file import load
+
+# Number of repetitions per timing
+REPEAT = 20
+
+def timed(func, X):
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        func(X)
+    return (time.perf_counter() - start) / REPEAT
+
+def main():
+    warnings.simplefilter('ignore')
+    column_transformer = load(MODEL_NAME, 'pkl')[0]
+    compiled = CompiledTransformer.from_column_transformer(column_transformer)
+    X = load('test.csv', 'csv').drop(columns='price')
+
+    print(f"{'rows':>8} {'sklearn (ms)':>13} {'compiled (ms)':>14} {'speedup':>8} {'max abs diff':>13}")
+    for n_rows in [1, 10, 100, len(X)]:
+        batch = X.head(n_rows)
+        sklearn_seconds = timed(column_transformer.transform, batch)
+        compiled_seconds = timed(compiled.transform, batch)
+        diff = compare_with_sklearn(column_transformer, batch)
+        print(f"{n_rows:>8} {sklearn_seconds * 1e3:>13.3f} {compiled_seconds * 1e3:>14.3f} "
+              f"{sklearn_seconds / compiled_seconds:>7.1f}x {diff:>13.2e}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,35 @@
+import time
+import warnings
+import numpy as np
+from main import convert_to_time
+from src.scripts.design_store import get_design
+from src.scripts.model_evaluation import compute_metrics
+from src.utils.load_file import load
+
+def main():
+    warnings.simplefilter('ignore')
+    model = load('RandomForestRegressor.pkl', 'pkl')
+    preprocessor, forest = model[0], model[-1]
+
+    print(f"{'split':>11} {'pipeline (s)':>13} {'store (s)':>10} {'identical':>10}")
+    for split_name in ('train', 'validation', 'test'):
+        df = load(f'{split_name}.csv', 'csv')
+        X, y = df.drop(columns='price'), df.price
+        convert_to_time(X)
+        get_design(split_name, preprocessor, X, y)
+
+        start = time.perf_counter()
+        expected = compute_metrics(y, model.predict(X), X.shape[1])
+        pipeline_seconds = time.perf_counter() - start
+
+        # Evaluate straight from the memory-mapped float32 matrix
+        start = time.perf_counter()
+        design, target, _ = get_design(split_name, preprocessor, X, y)
+        result = compute_metrics(target, forest.predict(design), X.shape[1])
+        store_seconds = time.perf_counter() - start
+
+        identical = all(np.isclose(expected[key], result[key], rtol=0, atol=1e-9) for key in expected)
+        print(f"{split_name:>11} {pipeline_seconds:>13.3f} {store_seconds:>10.3f} {str(identical):>10}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,39 @@
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+import warnings
+from pathlib import Path
+import pandas as pd
+from src.scripts.model_prediction import SCORING_ENGINES, parallel_batch_prediction
+from src.utils.load_file import load
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure offline scoring throughput against the number of worker processes.')
+    parser.add_argument('--rows', type=int, default=500_000, help='Rows to score (the test split, replicated)')
+    parser.add_argument('--engine', choices=SCORING_ENGINES, default='artifact')
+    parser.add_argument('--workers', type=int, nargs='+', default=sorted({1, 2, 4, os.cpu_count()}))
+    args = parser.parse_args()
+
+    warnings.simplefilter('ignore')
+    test = load('test.csv', 'csv')
+    queries = pd.concat([test] * (args.rows // len(test) + 1), ignore_index=True).head(args.rows)
+
+    with tempfile.TemporaryDirectory() as directory:
+        input_file, output_file = Path(directory) / 'queries.csv', Path(directory) / 'scored.csv'
+        queries.to_csv(input_file, index=False)
+
+        print(f"{'workers':>8} {'seconds':>8} {'rows/s':>10} {'speedup':>8}")
+        baseline = None
+        for n_workers in args.workers:
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                parallel_batch_prediction(input_file, output_file, n_workers=n_workers, engine=args.engine)
+            seconds = time.perf_counter() - start
+            baseline = baseline or seconds
+            print(f"{n_workers:>8} {seconds:>8.2f} {args.rows / seconds:>10.0f} {baseline / seconds:>7.2f}x")
+
+if __name__ == '__main__':
+    main()
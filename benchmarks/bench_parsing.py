@@ -0,0 +1,46 @@
+import time
+import pandas as pd
+from src.scripts.data_cleaning import (
+    clean_column_names, strip_string_columns, clean_airline_names,
+    convert_dates, convert_times, convert_duration, drop_invalid_rows
+)
+from src.utils.load_file import load
+
+# Replication factors of data/flight_price.csv to benchmark
+SCALES = [1, 10, 100]
+
+def reference_conversions(df):
+    """
+    The element-wise date, time and duration parsing that parse_unique replaced, kept as the reference.
+    """
+    df['date_of_journey'] = pd.to_datetime(df['date_of_journey'], dayfirst=True)
+    df['dep_time'] = pd.to_datetime(df['dep_time'], format='mixed').dt.time
+    df['arrival_time'] = pd.to_datetime(df['arrival_time'], format='mixed').dt.time
+    duration_split = df['duration'].str.split(" ", expand=True).set_axis(["hour", "minute"], axis=1)
+    duration_split['hour'] = duration_split['hour'].str.replace("h", "").astype(int).mul(60)
+    duration_split['minute'] = duration_split['minute'].str.replace("m", "").fillna("0").astype(int)
+    df['duration_minute'] = duration_split.sum(axis=1)
+    return df.drop(columns=['duration'])
+
+def conversions(df):
+    return convert_duration(convert_times(convert_dates(df)))
+
+def timed(func, df):
+    start = time.perf_counter()
+    result = func(df.copy())
+    return result, time.perf_counter() - start
+
+def main():
+    raw = drop_invalid_rows(load('flight_price.csv', 'csv')).dropna()
+    raw = clean_airline_names(strip_string_columns(clean_column_names(raw)))
+
+    print(f"{'rows':>10} {'reference (s)':>14} {'parse_unique (s)':>17} {'speedup':>8} {'identical':>10}")
+    for scale in SCALES:
+        df = pd.concat([raw] * scale, ignore_index=True)
+        expected, reference_seconds = timed(reference_conversions, df)
+        result, fast_seconds = timed(conversions, df)
+        identical = expected.equals(result) and (expected.dtypes == result.dtypes).all()
+        print(f"{len(df):>10} {reference_seconds:>14.3f} {fast_seconds:>17.3f} {reference_seconds / fast_seconds:>7.1f}x {str(identical):>10}")
+
+if __name__ == '__main__':
+    main()
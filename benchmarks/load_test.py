@@ -0,0 +1,69 @@
+import argparse
+import asyncio
+import json
+import time
+import numpy as np
+from src.utils.load_file import load
+from src.scripts.prediction_cache import QUERY_COLUMNS
+
+async def client(host, port, queries, n_requests, latencies, statuses):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for i in range(n_requests):
+            body = json.dumps(queries[i % len(queries)]).encode()
+            start = time.perf_counter()
+            writer.write(
+                f'POST /predict HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n'
+                f'Content-Length: {len(body)}\r\n\r\n'.encode() + body
+            )
+            await writer.drain()
+
+            status = int((await reader.readline()).split()[1])
+            length = 0
+            while (line := await reader.readline()) not in (b'\r\n', b''):
+                name, _, value = line.decode().partition(':')
+                if name.lower() == 'content-length':
+                    length = int(value)
+            await reader.readexactly(length)
+
+            latencies.append(time.perf_counter() - start)
+            statuses[status] = statuses.get(status, 0) + 1
+    finally:
+        writer.close()
+
+async def run(host, port, concurrency, requests_per_client):
+    test = load('test.csv', 'csv')
+    queries = test[QUERY_COLUMNS].astype({'duration_minute': int, 'total_stops': int}).to_dict('records')
+
+    latencies, statuses = [], {}
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        client(host, port, queries[i::concurrency], requests_per_client, latencies, statuses)
+        for i in range(concurrency)
+    ))
+    seconds = time.perf_counter() - start
+
+    latencies_ms = np.array(latencies) * 1e3
+    return {
+        'concurrency': concurrency,
+        'requests': len(latencies),
+        'statuses': statuses,
+        'throughput_rps': len(latencies) / seconds,
+        'p50_ms': float(np.percentile(latencies_ms, 50)),
+        'p95_ms': float(np.percentile(latencies_ms, 95)),
+        'p99_ms': float(np.percentile(latencies_ms, 99)),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate concurrent load against serve.py.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32, 128])
+    parser.add_argument('--requests-per-client', type=int, default=50)
+    args = parser.parse_args()
+
+    for concurrency in args.concurrency:
+        print(json.dumps(asyncio.run(run(args.host, args.port, concurrency, args.requests_per_client))))
+
+if __name__ == '__main__':
+    main()
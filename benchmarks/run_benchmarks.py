@@ -0,0 +1,163 @@
+import argparse
+import contextlib
+import io
+import json
+import platform
+import subprocess
+import time
+import tracemalloc
+import warnings
+from datetime import datetime, timezone
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+from main import convert_to_time
+from src.scripts.data_cleaning import clean_df
+from src.scripts.model_evaluation import evaluation
+from src.scripts.model_training import column_transformer, pipeline
+from src.scripts.synthetic_data import fit_generator, sample
+from src.utils.load_file import load
+from src.utils.split_dataset import split
+
+# Default replication factors of data/flight_price.csv
+SCALES = [10, 100, 1000]
+
+# Default file the results are appended to, one JSON object per line
+RESULTS_FILE = Path(__file__).resolve().parent / 'results.jsonl'
+
+def scaled_raw_data(scale, synthetic=False):
+    """
+    Build a raw dataset scale times the size of data/flight_price.csv.
+
+    Either replicates the raw data, shifting each copy's price by its copy number so the copies are
+    distinct rows and survive drop_duplicates in clean_df, or draws synthetic rows from it.
+    """
+    raw = load('flight_price.csv', 'csv')
+    if synthetic:
+        return sample(fit_generator(raw), len(raw) * scale, np.random.default_rng(42))
+    return pd.concat([raw.assign(Price=raw['Price'] + i) for i in range(scale)], ignore_index=True)
+
+def stage_clean(ctx):
+    ctx['df'] = clean_df(ctx['raw'].copy())
+    return len(ctx['df'])
+
+def stage_split(ctx):
+    ctx['splits'] = split(ctx['df'])
+    return len(ctx['df'])
+
+def stage_convert_to_time(ctx):
+    X_train, _, X_val, _, X_test, _ = ctx['splits']
+    convert_to_time(X_train, X_val, X_test)
+    return len(X_train) + len(X_val) + len(X_test)
+
+def stage_transformer_fit(ctx):
+    X_train, y_train = ctx['splits'][:2]
+    ctx['preprocessor'] = clone(column_transformer).fit(X_train, y_train)
+    return len(X_train)
+
+def stage_transformer_transform(ctx):
+    X_train = ctx['splits'][0]
+    ctx['preprocessor'].transform(X_train)
+    return len(X_train)
+
+def stage_train(ctx):
+    # Same pipeline as rf_train, without overwriting the saved model
+    X_train, y_train = ctx['splits'][:2]
+    ctx['model'] = clone(pipeline).fit(X_train, y_train)
+    return len(X_train)
+
+def stage_evaluation(ctx):
+    _, _, X_val, y_val, _, _ = ctx['splits']
+    with contextlib.redirect_stdout(io.StringIO()):
+        evaluation(ctx['model'], 'validation', X_val, y_val)
+    return len(X_val)
+
+def stage_prediction_single(ctx):
+    X_test = ctx['splits'][4]
+    query = X_test.head(1)
+    for _ in range(10):
+        ctx['model'].predict(query)
+    return 10
+
+def stage_prediction_batch(ctx):
+    X_test = ctx['splits'][4]
+    ctx['model'].predict(X_test)
+    return len(X_test)
+
+STAGES = {
+    'clean_df': stage_clean,
+    'split': stage_split,
+    'convert_to_time': stage_convert_to_time,
+    'column_transformer.fit': stage_transformer_fit,
+    'column_transformer.transform': stage_transformer_transform,
+    'rf_train': stage_train,
+    'evaluation': stage_evaluation,
+    'prediction.single_row_x10': stage_prediction_single,
+    'prediction.batch': stage_prediction_batch,
+}
+
+def run_stage(func, ctx, memory):
+    """
+    Run one stage and measure its wall time, CPU time and (optionally) the peak memory traced by tracemalloc
+    (Python and NumPy allocations; memory allocated inside compiled extensions such as tree building is not traced).
+    """
+    if memory:
+        tracemalloc.start()
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    rows = func(ctx)
+    result = {'wall_seconds': time.perf_counter() - wall_start, 'cpu_seconds': time.process_time() - cpu_start, 'rows': rows}
+    if memory:
+        result['peak_traced_memory_mb'] = tracemalloc.get_traced_memory()[1] / 1e6
+        tracemalloc.stop()
+    return result
+
+def run_suite(scale, memory, synthetic=False):
+    """
+    Run every stage in order on the dataset scaled scale times.
+
+    Timing and memory are measured in separate passes, since tracing allocations slows the stages down.
+    """
+    results = []
+    timing_ctx = {'raw': scaled_raw_data(scale, synthetic)}
+    memory_ctx = {'raw': timing_ctx['raw']}
+    for name, func in STAGES.items():
+        result = run_stage(func, timing_ctx, memory=False)
+        if memory:
+            result['peak_traced_memory_mb'] = run_stage(func, memory_ctx, memory=True)['peak_traced_memory_mb']
+        result.update(stage=name, scale=scale, synthetic=synthetic, raw_rows=len(timing_ctx['raw']))
+        results.append(result)
+        print(json.dumps(result))
+    return results
+
+def run_metadata():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'commit': commit,
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'pandas': pd.__version__,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark every stage of the training and prediction pipeline.')
+    parser.add_argument('--scales', type=int, nargs='+', default=SCALES, help='Replication factors of the raw dataset')
+    parser.add_argument('--synthetic', action='store_true', help='Draw synthetic rows instead of replicating the raw data')
+    parser.add_argument('--no-memory', action='store_true', help='Skip the memory profiling pass')
+    parser.add_argument('--output', type=Path, default=RESULTS_FILE, help='JSON lines file the run is appended to')
+    args = parser.parse_args()
+
+    warnings.simplefilter('ignore')
+    run = run_metadata()
+    run['results'] = [result for scale in args.scales for result in run_suite(scale, not args.no_memory, args.synthetic)]
+
+    with open(args.output, 'a') as file:
+        file.write(json.dumps(run) + '\n')
+    print(f"Results appended to '{args.output}'.")
+
+if __name__ == '__main__':
+    main()
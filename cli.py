@@ -0,0 +1,234 @@
+import argparse
+import json
+import sys
+from pathlib import Path
+from src.scripts.model_backends import BACKENDS, DEFAULT_BACKEND, model_file_name
+
+# Subcommand modules are imported inside each command, so 'predict' never loads pandas, sklearn or feature_engine
+BACKEND_NAMES = list(BACKENDS)
+
+# Model input columns, in order
+QUERY_COLUMNS = [
+    'airline', 'date_of_journey', 'source', 'destination',
+    'dep_time', 'arrival_time', 'duration_minute', 'total_stops'
+]
+
+def load_predictor(backend=DEFAULT_BACKEND):
+    """
+    Load the memory-mapped model artifact of a backend, falling back to the pickled pipeline.
+
+    The artifact is only used if it was saved from the current pickle; otherwise the pickle is loaded with a warning.
+
+    Parameters:
+        backend (str): The model backend (random forests have an artifact, other backends only the pickle).
+
+    Returns:
+        tuple: The predictor and whether it is the pickled pipeline (which needs a DataFrame input).
+    """
+    from src.scripts.model_artifact import artifact_path, is_current, load_artifact
+
+    model_name = model_file_name(backend)
+    stem = Path(model_name).stem
+    if (artifact_path(stem) / 'meta.json').exists():
+        if is_current(stem):
+            predictor = load_artifact(stem)
+            if predictor is not None:
+                return predictor, False
+        else:
+            print(f"Warning: the artifact '{stem}.artifact' does not match '{model_name}'. Using the pickled model.")
+
+    from src.utils.load_file import load
+    predictor = load(model_name, 'pkl')
+    if predictor is None:
+        raise FileNotFoundError(f"No trained model found. Run 'python cli.py train --backend {backend}' first.")
+    return predictor, True
+
+def read_queries(args):
+    """
+    Read the queries of the predict command as a dict of column lists.
+    """
+    if args.input:
+        import csv
+        with open(args.input, newline='') as file:
+            rows = list(csv.DictReader(file))
+    elif args.query:
+        query = json.loads(args.query)
+        rows = query if isinstance(query, list) else [query]
+    else:
+        rows = [{col: getattr(args, col) for col in QUERY_COLUMNS}]
+
+    missing = sorted({col for row in rows for col in QUERY_COLUMNS if row.get(col) is None})
+    if missing:
+        raise ValueError(f"Missing columns: {missing}")
+    return rows, {col: [row[col] for row in rows] for col in QUERY_COLUMNS}
+
+def predict_command(args):
+    rows, columns = read_queries(args)
+    predictor, needs_frame = load_predictor(args.backend)
+    if needs_frame:
+        import pandas as pd
+        columns = pd.DataFrame(columns).astype({'duration_minute': int, 'total_stops': int})
+    predictions = predictor.predict(columns)
+
+    if args.output:
+        import csv
+        with open(args.output, 'w', newline='') as file:
+            writer = csv.DictWriter(file, fieldnames=list(rows[0]) + ['predicted_price'])
+            writer.writeheader()
+            for row, value in zip(rows, predictions):
+                writer.writerow({**row, 'predicted_price': float(value)})
+        print(f"File '{args.output}' saved successfully ({len(rows)} rows).")
+    else:
+        for value in predictions:
+            print(f"{float(value):.2f}")
+
+def train_command(args):
+    if args.cached:
+        from main import cached_train
+        cached_train(json.loads(args.params) if args.params else None, args.split_method, args.backend)
+    else:
+        from main import train
+        train(args.backend)
+
+def score_command(args):
+    from src.scripts.model_prediction import parallel_batch_prediction
+    if parallel_batch_prediction(
+        args.input, args.output, args.chunk_size, args.workers, args.engine, model_file_name(args.backend)
+    ) is None:
+        sys.exit(1)
+
+def compare_command(args):
+    from main import compare
+    results = compare(args.backends)
+    if results is None:
+        sys.exit(1)
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2)
+        print(f"Comparison report '{args.output}' saved successfully.")
+
+def prune_command(args):
+    from main import prune
+    prune(args.target_us_per_row)
+
+def evaluate_command(args):
+    from main import convert_to_time
+    from src.scripts.model_evaluation import evaluate
+    from src.utils.load_file import load
+
+    model = load(model_file_name(args.backend), 'pkl')
+    if model is None:
+        raise FileNotFoundError(f"No trained model found. Run 'python cli.py train --backend {args.backend}' first.")
+
+    splits = {}
+    for name in args.splits:
+        df = load(f'{name}.csv', 'csv')
+        X = df.drop(columns='price')
+        convert_to_time(X)
+        splits[name] = (X, df.price)
+
+    for name, result in evaluate(model, splits, n_bootstrap=args.bootstrap).items():
+        print('================================')
+        print(f"{name} ({result.n_rows} rows)")
+        for metric, value in result.metrics.items():
+            interval = result.intervals.get(metric)
+            print(f"{metric}: {value:.4f}" + (f" [{interval[0]:.4f}, {interval[1]:.4f}]" if interval else ''))
+        for segment, table in result.segments.items():
+            print(f"\nBy {segment}:")
+            print(table.round(4).to_string())
+
+def fares_build_command(args):
+    from src.scripts.fare_table import build_fare_table, observed_schedules, schedule_grid
+    from src.utils.load_file import load
+
+    df = load('train.csv', 'csv')
+    if df is None:
+        raise FileNotFoundError("No training split found. Run 'python cli.py train' first.")
+
+    if args.grid:
+        if not args.durations:
+            raise ValueError("--grid requires --durations.")
+        schedules = schedule_grid(
+            sorted(df.airline.unique()),
+            sorted(set(zip(df.source, df.destination))),
+            sorted(int(stops) for stops in df.total_stops.unique()),
+            args.durations,
+            args.dep_step_minutes
+        )
+    else:
+        schedules = observed_schedules(df.drop(columns='price'))
+
+    name = args.name or Path(model_file_name(args.backend)).stem
+    if build_fare_table(schedules, args.start, args.days, name, model_file_name(args.backend)) is None:
+        sys.exit(1)
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='Train, evaluate and query the flight price model.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    train_parser = subparsers.add_parser('train', help='Clean the data, train, save and evaluate the model')
+    train_parser.add_argument('--cached', action='store_true', help='Reuse the stages whose inputs did not change')
+    train_parser.add_argument('--params', help="Parameters of the backend's estimator as a JSON object (with --cached)")
+    train_parser.add_argument('--split-method', choices=['random', 'hash'], default='random', help='Split method (with --cached)')
+    train_parser.add_argument('--backend', choices=BACKEND_NAMES, default=DEFAULT_BACKEND, help='Model backend')
+    train_parser.set_defaults(func=train_command)
+
+    compare_parser = subparsers.add_parser('compare', help='Compare the model backends on the validation split')
+    compare_parser.add_argument('--backends', nargs='+', choices=BACKEND_NAMES, help='Backends to compare (default: all)')
+    compare_parser.add_argument('--output', help='JSON file to write the comparison report to')
+    compare_parser.set_defaults(func=compare_command)
+
+    evaluate_parser = subparsers.add_parser('evaluate', help='Evaluate the saved model on the saved splits')
+    evaluate_parser.add_argument('--splits', nargs='+', default=['validation', 'test'], help='Split CSV files in data/')
+    evaluate_parser.add_argument('--bootstrap', type=int, default=1000, help='Bootstrap resamples (0 to skip the intervals)')
+    evaluate_parser.add_argument('--backend', choices=BACKEND_NAMES, default=DEFAULT_BACKEND, help='Backend of the model to evaluate')
+    evaluate_parser.set_defaults(func=evaluate_command)
+
+    predict_parser = subparsers.add_parser('predict', help='Predict prices with the saved model')
+    predict_parser.add_argument('--input', help='CSV file of queries')
+    predict_parser.add_argument('--output', help='CSV file to write the queries and predicted_price to')
+    predict_parser.add_argument('--query', help='A JSON query object or list of query objects')
+    predict_parser.add_argument('--backend', choices=BACKEND_NAMES, default=DEFAULT_BACKEND, help='Backend of the model to query')
+    for col in QUERY_COLUMNS:
+        predict_parser.add_argument(f'--{col.replace("_", "-")}', dest=col)
+    predict_parser.set_defaults(func=predict_command)
+
+    prune_parser = subparsers.add_parser('prune', help='Save a smaller forest meeting a per-row latency target')
+    prune_parser.add_argument('target_us_per_row', type=float, help='Target batch inference time per row, in microseconds')
+    prune_parser.set_defaults(func=prune_command)
+
+    score_parser = subparsers.add_parser('score', help='Score a CSV file of queries across worker processes')
+    score_parser.add_argument('input', help='CSV file of queries')
+    score_parser.add_argument('output', help='CSV file to write the queries and predicted_price to')
+    score_parser.add_argument('--workers', type=int, help='Worker processes (default: all cores)')
+    score_parser.add_argument('--chunk-size', type=int, default=10_000, help='Rows scored per task')
+    score_parser.add_argument('--engine', choices=['sklearn', 'forest', 'artifact'], default='artifact')
+    score_parser.add_argument('--backend', choices=BACKEND_NAMES, default=DEFAULT_BACKEND, help='Backend of the model to score with')
+    score_parser.set_defaults(func=score_command)
+
+    fares_parser = subparsers.add_parser('fares', help='Manage precomputed fare tables')
+    fares_subparsers = fares_parser.add_subparsers(dest='fares_command', required=True)
+    fares_build_parser = fares_subparsers.add_parser('build', help='Build a fare table with the saved model')
+    fares_build_parser.add_argument('--start', required=True, help="First date of the horizon ('YYYY-MM-DD')")
+    fares_build_parser.add_argument('--days', type=int, required=True, help='Number of dates covered from --start')
+    schedules_group = fares_build_parser.add_mutually_exclusive_group(required=True)
+    schedules_group.add_argument('--observed', action='store_true', help='Cover the schedules of the training split')
+    schedules_group.add_argument('--grid', action='store_true', help='Cover every airline x route x departure time x duration x stops')
+    fares_build_parser.add_argument('--durations', type=int, nargs='+', help='Flight durations in minutes (with --grid)')
+    fares_build_parser.add_argument('--dep-step-minutes', type=int, default=5, help='Departure-time bucket width (with --grid)')
+    fares_build_parser.add_argument('--name', help='Fare table name (default: the model name)')
+    fares_build_parser.add_argument('--backend', choices=BACKEND_NAMES, default=DEFAULT_BACKEND, help='Backend of the model to build with')
+    fares_build_parser.set_defaults(func=fares_build_command)
+
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        args.func(args)
+    except (FileNotFoundError, ValueError) as e:
+        print(e)
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -1,42 +1,181 @@
 import pandas as pd
+from pathlib import Path
+from sklearn.base import clone
+from sklearn.pipeline import Pipeline
 from src.scripts.data_cleaning import clean_df
-from src.scripts.model_training import rf_train
-from src.scripts.model_evaluation import evaluation
+from src.scripts.design_store import predict_split
+from src.scripts.model_artifact import save_artifact
+from src.scripts.model_training import (
+    BACKENDS, column_transformer, compare_backends, make_pipeline, rf_prune, rf_train, rf_tune, rf_update
+)
+from src.scripts.model_evaluation import compute_metrics, evaluation
 from src.scripts.model_prediction import prediction
 from src.utils.load_file import load
+from src.utils.parsing import parse_unique
+from src.utils.profiling import is_enabled, stage, write_report
+from src.utils.save_model import save
 from src.utils.split_dataset import split
+from src.utils.stage_cache import StageRunner, code_hash, file_hash, fingerprint, project_modules
 
 MAIN_DATASET_FILE_NAME = 'flight_price.csv'
 MODEL_NAME = 'RandomForestRegressor.pkl'
 
-def convert_to_time(X_train, X_val, X_test):
-    X_train['dep_time'] = pd.to_datetime(X_train['dep_time'].astype(str), format='%H:%M:%S')
-    X_train['arrival_time'] = pd.to_datetime(X_train['arrival_time'].astype(str), format='%H:%M:%S')
+# Written by train() when profiling is enabled (FLIGHT_PRICE_PROFILE=1)
+PROFILE_REPORT_FILE_NAME = 'training_profile.json'
 
-    X_val['dep_time'] = pd.to_datetime(X_val['dep_time'].astype(str), format='%H:%M:%S')
-    X_val['arrival_time'] = pd.to_datetime(X_val['arrival_time'].astype(str), format='%H:%M:%S')
+def parse_time(ser):
+    return pd.to_datetime(ser.astype(str), format='%H:%M:%S')
 
-    X_test['dep_time'] = pd.to_datetime(X_test['dep_time'].astype(str), format='%H:%M:%S')
-    X_test['arrival_time'] = pd.to_datetime(X_test['arrival_time'].astype(str), format='%H:%M:%S')
+def convert_to_time(*frames):
+    for X in frames:
+        for col in ['dep_time', 'arrival_time']:
+            # Compact frames from clean_df(compact=True) already hold datetime64 times
+            if not pd.api.types.is_datetime64_any_dtype(X[col]):
+                X[col] = parse_unique(X[col], parse_time)
     
 
-def train():  
+def train(backend='random_forest'):  
+    with stage('train.load'):
+        df = load(file_name=MAIN_DATASET_FILE_NAME, file_type='csv')
+    with stage('train.clean_df', rows=len(df)):
+        df = clean_df(df)
+    with stage('train.split', rows=len(df)):
+        X_train, y_train, X_val, y_val, X_test, y_test = split(df)
+    with stage('train.convert_to_time', rows=len(df)):
+        convert_to_time(X_train, X_val, X_test)
+    with stage('train.rf_train', rows=len(X_train)):
+        rf_train(X_train, y_train, backend)
+    with stage('train.load_model'):
+        model = load(file_name=f"{BACKENDS[backend]['model_name']}.pkl", file_type='pkl')
+    
+    print('================================')
+    with stage('train.evaluation.train', rows=len(X_train)):
+        evaluation(model, 'train', X_train, y_train)
+    print('================================')
+    with stage('train.evaluation.validation', rows=len(X_val)):
+        evaluation(model, 'validation', X_val, y_val)
+    print('================================')
+    with stage('train.evaluation.test', rows=len(X_test)):
+        evaluation(model, 'test', X_test, y_test)
+    print('================================')
+
+    if is_enabled():
+        write_report(PROFILE_REPORT_FILE_NAME)
+    
+
+def tune():
     df = load(file_name=MAIN_DATASET_FILE_NAME, file_type='csv')
     df = clean_df(df)
     X_train, y_train, X_val, y_val, X_test, y_test = split(df)
     convert_to_time(X_train, X_val, X_test)
-    rf_train(X_train, y_train)
+    rf_tune(X_train, y_train, X_val, y_val)
     model = load(file_name=MODEL_NAME, file_type='pkl')
     
     print('================================')
-    evaluation(model, 'train', X_train, y_train)
-    print('================================')
-    evaluation(model, 'vaidation', X_val, y_val)
+    evaluation(model, 'validation', X_val, y_val)
     print('================================')
     evaluation(model, 'test', X_test, y_test)
     print('================================')
     
 
+def cached_train(params=None, split_method='random', backend='random_forest'):
+    """
+    Run train() as cached stages, recomputing only the stages whose inputs changed.
+
+    Each stage is fingerprinted by the raw file hash, the code it runs, its parameters and the
+    fingerprint of the stage before it, so e.g. changing only params refits only the model.
+    """
+    runner = StageRunner()
+    estimator = make_pipeline(backend)[-1]
+    params = {**estimator.get_params(), **(params or {})}
+    raw_path = Path(__file__).resolve().parent / 'data' / MAIN_DATASET_FILE_NAME
+
+    clean_key = fingerprint(file_hash(raw_path), code_hash(*project_modules(clean_df)))
+    df = runner.run('clean_df', clean_key, lambda: clean_df(load(file_name=MAIN_DATASET_FILE_NAME, file_type='csv')))
+
+    split_key = fingerprint(clean_key, code_hash(*project_modules(split)), split_method)
+    splits = runner.run('split', split_key, lambda: split(df, method=split_method))
+
+    def convert():
+        convert_to_time(*splits[::2])
+        return splits
+
+    convert_key = fingerprint(split_key, code_hash(parse_time, convert_to_time, *project_modules(parse_unique)))
+    X_train, y_train, X_val, y_val, X_test, y_test = runner.run('convert_to_time', convert_key, convert)
+    # Unpickled targets can wrap read-only buffers, which sklearn's input validation rejects
+    y_train, y_val, y_test = y_train.copy(), y_val.copy(), y_test.copy()
+
+    def fit_preprocessor():
+        preprocessor = clone(column_transformer).fit(X_train, y_train)
+        return preprocessor, preprocessor.transform(X_train)
+
+    # column_transformer and its custom functions are defined next to rf_train, in model_training
+    preprocessor_key = fingerprint(convert_key, code_hash(*project_modules(rf_train)))
+    preprocessor, X_train_design = runner.run('preprocessor', preprocessor_key, fit_preprocessor)
+
+    model_key = fingerprint(preprocessor_key, backend, params)
+    fitted = runner.run('model', model_key, lambda: estimator.set_params(**params).fit(X_train_design, y_train))
+    model = Pipeline(steps=[('preprocessor', preprocessor), (BACKENDS[backend]['step'], fitted)])
+
+    def evaluate_splits():
+        # The training split is already transformed; the others are read from the design store
+        predictions = {
+            'train': fitted.predict(X_train_design),
+            'validation': predict_split(model, 'validation', X_val, y_val),
+            'test': predict_split(model, 'test', X_test, y_test),
+        }
+        return {
+            name: compute_metrics(y, predictions[name], X.shape[1])
+            for name, X, y in (('train', X_train, y_train), ('validation', X_val, y_val), ('test', X_test, y_test))
+        }
+
+    metrics = runner.run('evaluation', fingerprint(model_key, code_hash(compute_metrics, predict_split)), evaluate_splits)
+
+    # Only random forests have a memory-mappable artifact
+    model_name = BACKENDS[backend]['model_name']
+    save(model, model_name)
+    if hasattr(fitted, 'estimators_'):
+        save_artifact(model, model_name)
+    for name, values in metrics.items():
+        print('================================')
+        print(f'{name} R^2: {values["r2"]:.4f}')
+        print(f'{name} Adjusted R^2: {values["adj_r2"]:.4f}')
+        print(f'{name} RMSE: {values["rmse"]:.4f}')
+    print('================================')
+    runner.print_report()
+    
+
+def update(new_file_name, n_new_trees=50, max_trees=None):
+    new_df = clean_df(load(file_name=new_file_name, file_type='csv'))
+    X_new, y_new = new_df.drop(columns='price'), new_df.price.copy()
+
+    # The standard validation and test splits saved by split_and_save
+    splits = []
+    for file_name in ('validation.csv', 'test.csv'):
+        df = load(file_name=file_name, file_type='csv')
+        splits += [df.drop(columns='price'), df.price.copy()]
+    X_val, y_val, X_test, y_test = splits
+
+    convert_to_time(X_new, X_val, X_test)
+    rf_update(X_new, y_new, X_val, y_val, X_test, y_test, n_new_trees=n_new_trees, max_trees=max_trees)
+    
+
+def compare(backends=None):
+    df = load(file_name=MAIN_DATASET_FILE_NAME, file_type='csv')
+    df = clean_df(df)
+    X_train, y_train, X_val, y_val, X_test, y_test = split(df)
+    convert_to_time(X_train, X_val, X_test)
+    return compare_backends(X_train, y_train, X_val, y_val, backends)
+    
+
+def prune(target_us_per_row):
+    # The standard validation split saved by split_and_save
+    df = load(file_name='validation.csv', file_type='csv')
+    X_val, y_val = df.drop(columns='price'), df.price.copy()
+    convert_to_time(X_val)
+    rf_prune(X_val, y_val, target_us_per_row)
+    
+
 def test():
     query = pd.DataFrame(
         {
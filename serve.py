@@ -0,0 +1,382 @@
+import argparse
+import asyncio
+import json
+import math
+import signal
+import pandas as pd
+from src.scripts.model_backends import BACKENDS, DEFAULT_BACKEND, model_file_name
+from src.scripts.model_prediction import ENGINES, get_predictor
+from src.scripts.prediction_cache import QUERY_COLUMNS
+from src.utils.serving_metrics import (
+    export_text, observed_predict, record_error, record_request, set_sample_rate, write_metrics
+)
+
+HOST = '127.0.0.1'
+PORT = 8000
+
+# Micro-batching: a batch is run when it reaches MAX_BATCH_SIZE or MAX_WAIT_MS after its first request
+MAX_BATCH_SIZE = 64
+MAX_WAIT_MS = 5
+
+# Requests waiting beyond MAX_QUEUE_SIZE are rejected (503), and answers slower than REQUEST_TIMEOUT_MS time out (504)
+MAX_QUEUE_SIZE = 1024
+REQUEST_TIMEOUT_MS = 1000
+
+# Share of predict calls whose latencies are recorded, and how often --metrics-file is rewritten
+METRICS_SAMPLE_RATE = 1.0
+METRICS_INTERVAL_S = 15
+
+# Time given to open connections to finish their current request on shutdown before they are closed
+SHUTDOWN_TIMEOUT_S = 5
+
+# Queued by MicroBatcher.stop to wake the batch loop
+_STOP = object()
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 503: 'Service Unavailable', 504: 'Gateway Timeout'}
+
+def coerce_record(record):
+    """
+    Check the fields of one query record and convert them to the types the model expects.
+
+    Records are checked before they are queued, so a bad record is rejected on its own instead of
+    failing the batch it would have been scored in.
+
+    Parameters:
+        record (dict): A query object with the 8 model input columns.
+
+    Returns:
+        dict: The model input columns, with a float duration and an int number of stops.
+
+    Raises:
+        ValueError: If a field has the wrong type or cannot be parsed.
+    """
+    for col in ('airline', 'source', 'destination', 'date_of_journey', 'dep_time', 'arrival_time'):
+        if not isinstance(record[col], str):
+            raise ValueError(f"'{col}' must be a string, got {record[col]!r}")
+    for col in ('date_of_journey', 'dep_time', 'arrival_time'):
+        try:
+            pd.Timestamp(record[col])
+        except (TypeError, ValueError):
+            raise ValueError(f"'{col}' is not a valid date or time: {record[col]!r}") from None
+
+    try:
+        duration = float(record['duration_minute'])
+        stops = float(record['total_stops'])
+    except (TypeError, ValueError):
+        raise ValueError("'duration_minute' and 'total_stops' must be numbers") from None
+    if not math.isfinite(duration) or duration <= 0:
+        raise ValueError(f"'duration_minute' must be a positive number, got {record['duration_minute']!r}")
+    if not stops.is_integer() or stops < 0:
+        raise ValueError(f"'total_stops' must be a whole number, got {record['total_stops']!r}")
+
+    return {**{col: record[col] for col in QUERY_COLUMNS}, 'duration_minute': duration, 'total_stops': int(stops)}
+
+class MicroBatcher:
+    """
+    Collects concurrent prediction requests and scores them with one model.predict call per batch.
+    """
+
+    def __init__(self, engine, model_name, max_batch_size, max_wait_ms, max_queue_size):
+        self.model_name = model_name
+        self.predictor = get_predictor(engine, model_name)
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.queue = asyncio.Queue(maxsize=max_queue_size)
+        self.batch_sizes = []
+        self.stopping = False
+
+    def submit(self, records):
+        """
+        Queue the records of one request for prediction, all of them or none.
+
+        Raises asyncio.QueueFull when the queue has no room for all the records or the batcher is stopping.
+        """
+        if self.stopping or (self.queue.maxsize and self.queue.qsize() + len(records) > self.queue.maxsize):
+            raise asyncio.QueueFull()
+        loop = asyncio.get_running_loop()
+        futures = []
+        for record in records:
+            futures.append(loop.create_future())
+            self.queue.put_nowait((record, futures[-1]))
+        return futures
+
+    def stop(self):
+        """
+        Ask run() to finish its current batch, score whatever is still queued and return.
+        """
+        self.stopping = True
+        try:
+            # Wake run() if it is waiting on an empty queue
+            self.queue.put_nowait(_STOP)
+        except asyncio.QueueFull:
+            pass
+
+    def _predict(self, records):
+        return observed_predict(self.predictor, pd.DataFrame.from_records(records, columns=QUERY_COLUMNS)).tolist()
+
+    def _predict_each(self, records):
+        """
+        Score the records one by one, returning the exception of each record that fails instead of its prediction.
+        """
+        outcomes = []
+        for record in records:
+            try:
+                outcomes.append(self._predict([record])[0])
+            except Exception as e:
+                outcomes.append(e)
+        return outcomes
+
+    async def run(self):
+        """
+        Run batches until stop() is called, then score whatever is still queued.
+        """
+        loop = asyncio.get_running_loop()
+        while not self.stopping:
+            item = await self.queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size and not self.stopping:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self.queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is _STOP:
+                    break
+                batch.append(item)
+            await self._run_batch(batch)
+
+        # Drain the queue so every accepted request gets an answer
+        while not self.queue.empty():
+            items = [self.queue.get_nowait() for _ in range(min(self.queue.qsize(), self.max_batch_size))]
+            batch = [item for item in items if item is not _STOP]
+            if batch:
+                await self._run_batch(batch)
+
+    async def _run_batch(self, batch):
+        # Requests that timed out have cancelled their futures; their records are not scored
+        batch = [(record, future) for record, future in batch if not future.done()]
+        if not batch:
+            return
+        records = [record for record, _ in batch]
+        self.batch_sizes.append(len(batch))
+        loop = asyncio.get_running_loop()
+        outcomes = None
+        try:
+            try:
+                outcomes = await loop.run_in_executor(None, self._predict, records)
+            except Exception as e:
+                # Rescore record by record, so a record the model rejects fails only its own request
+                outcomes = [e] if len(records) == 1 else await loop.run_in_executor(None, self._predict_each, records)
+        finally:
+            # Resolve every future, even if the batch was interrupted, so no request is left waiting
+            for i, (_, future) in enumerate(batch):
+                if future.done():
+                    continue
+                outcome = outcomes[i] if outcomes is not None else RuntimeError('The prediction batch was interrupted')
+                if isinstance(outcome, Exception):
+                    future.set_exception(outcome)
+                else:
+                    future.set_result(outcome)
+
+class PredictionServer:
+    """
+    A minimal HTTP/1.1 JSON server in front of a MicroBatcher.
+
+    Routes:
+        POST /predict: a query object or a list of query objects -> {"predictions": [...]}
+        GET /health: {"status": "ok", "queued": n, "batches": n, "mean_batch_size": x}
+        GET /metrics: the prediction metrics in the Prometheus text format
+    """
+
+    def __init__(self, batcher, request_timeout_ms):
+        self.batcher = batcher
+        self.request_timeout = request_timeout_ms / 1000
+        self.closing = False
+        # Open connections: writer -> (handler task, whether it is waiting for a new request)
+        self.connections = {}
+
+    async def handle(self, reader, writer):
+        task = asyncio.current_task()
+        try:
+            while not self.closing:
+                self.connections[writer] = (task, True)
+                request_line = await reader.readline()
+                self.connections[writer] = (task, False)
+                if not request_line:
+                    break
+                method, target, _ = request_line.decode('latin-1').split(' ', 2)
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get('content-length', 0)))
+
+                status, payload = await self.route(method, target, body)
+                if isinstance(payload, str):
+                    data, content_type = payload.encode(), 'text/plain; version=0.0.4'
+                else:
+                    data, content_type = json.dumps(payload).encode(), 'application/json'
+                keep_alive = headers.get('connection', '').lower() != 'close' and not self.closing
+                writer.write(
+                    f'HTTP/1.1 {status} {REASONS[status]}\r\n'
+                    f'Content-Type: {content_type}\r\nContent-Length: {len(data)}\r\n'
+                    f'Connection: {"keep-alive" if keep_alive else "close"}\r\n\r\n'.encode() + data
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            self.connections.pop(writer, None)
+            writer.close()
+
+    async def close(self, timeout_s):
+        """
+        Close idle keep-alive connections now, and the others once their current request is answered.
+
+        Connections still open after timeout_s seconds are closed anyway.
+        """
+        self.closing = True
+        for writer, (_, idle) in list(self.connections.items()):
+            if idle:
+                writer.close()
+        tasks = [task for task, _ in self.connections.values()]
+        if tasks:
+            await asyncio.wait(tasks, timeout=timeout_s)
+        for writer in list(self.connections):
+            writer.close()
+
+    async def route(self, method, target, body):
+        if method == 'GET' and target == '/health':
+            sizes = self.batcher.batch_sizes
+            return 200, {
+                'status': 'ok',
+                'queued': self.batcher.queue.qsize(),
+                'batches': len(sizes),
+                'mean_batch_size': sum(sizes) / len(sizes) if sizes else 0.0,
+            }
+
+        if method == 'GET' and target == '/metrics':
+            return 200, export_text(self.batcher.model_name)
+
+        if method == 'POST' and target == '/predict':
+            try:
+                query = json.loads(body)
+                records = query if isinstance(query, list) else [query]
+                if not all(isinstance(record, dict) for record in records):
+                    raise TypeError('Each query must be a JSON object')
+                missing = [col for record in records for col in QUERY_COLUMNS if col not in record]
+                if missing:
+                    raise ValueError(f'Missing columns: {sorted(set(missing))}')
+                futures = self.batcher.submit([coerce_record(record) for record in records])
+                record_request()
+            except json.JSONDecodeError as e:
+                record_error(e)
+                return 400, {'error': f'Invalid JSON: {e}'}
+            except (TypeError, ValueError) as e:
+                record_error(e)
+                return 400, {'error': str(e)}
+            except asyncio.QueueFull as e:
+                record_error(e)
+                return 503, {'error': 'Prediction queue is full'}
+
+            try:
+                predictions = await asyncio.wait_for(asyncio.gather(*futures), self.request_timeout)
+            except asyncio.TimeoutError as e:
+                record_error(e)
+                return 504, {'error': 'Prediction timed out'}
+            except Exception as e:
+                # Errors raised by the model are already counted by observed_predict
+                return 400, {'error': str(e)}
+            return 200, {'predictions': predictions}
+
+        return 404, {'error': f'Unknown route {method} {target}'}
+
+async def write_metrics_periodically(metrics_file, interval_s, model_name):
+    """
+    Rewrite the metrics file every interval_s seconds until cancelled, then one last time.
+    """
+    try:
+        while True:
+            write_metrics(metrics_file, model_name)
+            await asyncio.sleep(interval_s)
+    except asyncio.CancelledError:
+        write_metrics(metrics_file, model_name)
+
+async def serve(host=HOST, port=PORT, engine='sklearn', backend=DEFAULT_BACKEND, max_batch_size=MAX_BATCH_SIZE, max_wait_ms=MAX_WAIT_MS,
+                max_queue_size=MAX_QUEUE_SIZE, request_timeout_ms=REQUEST_TIMEOUT_MS,
+                metrics_sample_rate=METRICS_SAMPLE_RATE, metrics_file=None, metrics_interval_s=METRICS_INTERVAL_S):
+    """
+    Serve predictions over HTTP until SIGINT or SIGTERM, then shut down gracefully.
+
+    Parameters:
+        host (str): The host to bind.
+        port (int): The port to bind.
+        engine (str): The prediction engine ('sklearn' or 'forest').
+        backend (str): The model backend whose trained model is served (see model_backends.BACKENDS).
+        max_batch_size (int): The maximum number of records per model.predict call.
+        max_wait_ms (float): The maximum time a batch waits for more requests after its first one.
+        max_queue_size (int): The maximum number of queued records before requests are rejected.
+        request_timeout_ms (float): The maximum time a request waits for its predictions.
+        metrics_sample_rate (float): The share of predict calls whose latencies are recorded.
+        metrics_file (str, optional): A file the metrics are periodically written to in the Prometheus text format.
+        metrics_interval_s (float): The time between two writes of metrics_file.
+
+    Returns:
+        None
+    """
+    set_sample_rate(metrics_sample_rate)
+    model_name = model_file_name(backend)
+    batcher = MicroBatcher(engine, model_name, max_batch_size, max_wait_ms, max_queue_size)
+    server = PredictionServer(batcher, request_timeout_ms)
+    batch_task = asyncio.create_task(batcher.run())
+    metrics_task = asyncio.create_task(write_metrics_periodically(metrics_file, metrics_interval_s, model_name)) if metrics_file else None
+    http_server = await asyncio.start_server(server.handle, host, port)
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    print(f"Serving predictions on http://{host}:{port} (model={model_name}, engine={engine}, max_batch_size={max_batch_size}, max_wait_ms={max_wait_ms}).")
+    await stop.wait()
+
+    # Stop accepting connections, answer everything already queued, then close the open connections
+    print("Shutting down...")
+    http_server.close()
+    batcher.stop()
+    await server.close(SHUTDOWN_TIMEOUT_S)
+    await batch_task
+    if metrics_task is not None:
+        metrics_task.cancel()
+        await asyncio.gather(metrics_task, return_exceptions=True)
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve flight price predictions over HTTP with micro-batching.')
+    parser.add_argument('--host', default=HOST)
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--engine', choices=ENGINES, default='sklearn')
+    parser.add_argument('--backend', choices=list(BACKENDS), default=DEFAULT_BACKEND)
+    parser.add_argument('--max-batch-size', type=int, default=MAX_BATCH_SIZE)
+    parser.add_argument('--max-wait-ms', type=float, default=MAX_WAIT_MS)
+    parser.add_argument('--max-queue-size', type=int, default=MAX_QUEUE_SIZE)
+    parser.add_argument('--request-timeout-ms', type=float, default=REQUEST_TIMEOUT_MS)
+    parser.add_argument('--metrics-sample-rate', type=float, default=METRICS_SAMPLE_RATE)
+    parser.add_argument('--metrics-file')
+    parser.add_argument('--metrics-interval-s', type=float, default=METRICS_INTERVAL_S)
+    args = parser.parse_args()
+
+    asyncio.run(serve(**vars(args)))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,276 @@
+import numpy as np
+
+# Hours of the day, used to tabulate the part-of-day features
+HOURS = np.arange(24)
+
+def _fitted_transformers(column_transformer):
+    """
+    Get the fitted transformers and their input columns by name.
+    """
+    return {
+        name: (transformer, columns)
+        for name, transformer, columns in column_transformer.transformers_
+        if name != 'remainder'
+    }
+
+def _min_max(scaler):
+    """
+    Get the fitted scale and offset of a MinMaxScaler.
+    """
+    return np.asarray(scaler.scale_, dtype=np.float64), np.asarray(scaler.min_, dtype=np.float64)
+
+def _label_table(pipeline, columns, labels):
+    """
+    Tabulate the output of a fitted categorical pipeline for every label.
+
+    Row i holds the output for labels[i] in each column.
+    """
+    import pandas as pd
+
+    n_rows = max(len(values) for values in labels)
+    frame = pd.DataFrame({
+        col: list(values) + [values[-1]] * (n_rows - len(values))
+        for col, values in zip(columns, labels)
+    })
+    return np.asarray(pipeline.transform(frame), dtype=np.float64)
+
+def _codes(values, labels):
+    """
+    Map each value to the index of its label; values without a label map to the last ('other') row.
+    """
+    values = np.asarray(values, dtype=object).astype(str)
+    if len(values) == 1:
+        position = np.flatnonzero(labels == values[0])
+        return position[:1] if len(position) else np.array([len(labels)])
+
+    uniques, inverse = np.unique(values, return_inverse=True)
+    lookup = {label: i for i, label in enumerate(labels)}
+    unique_codes = np.array([lookup.get(value, len(labels)) for value in uniques], dtype=np.intp)
+    return unique_codes[inverse]
+
+def _to_days(values):
+    """
+    Convert dates to datetime64[D], falling back to pandas for formats numpy does not parse.
+    """
+    values = np.asarray(values)
+    try:
+        return values.astype('datetime64[D]')
+    except (ValueError, TypeError):
+        import pandas as pd
+        return pd.to_datetime(pd.Series(values), format='mixed', yearfirst=True).to_numpy().astype('datetime64[D]')
+
+def _minute_of_day(values):
+    """
+    Convert times (datetime64, datetime.time or 'HH:MM[:SS]' strings) to minutes since midnight.
+    """
+    values = np.asarray(values)
+    if values.dtype.kind == 'M':
+        return values.astype('datetime64[m]').astype(np.int64) % 1440
+
+    uniques, inverse = np.unique(values.astype(str), return_inverse=True)
+    try:
+        minutes = np.array([int(value[:2]) * 60 + int(value[3:5]) for value in uniques], dtype=np.int64)
+    except ValueError:
+        import pandas as pd
+        parsed = pd.to_datetime(pd.Series(uniques), format='mixed', yearfirst=True)
+        minutes = (parsed.dt.hour * 60 + parsed.dt.minute).to_numpy(dtype=np.int64)
+    return minutes[inverse]
+
+class CompiledTransformer:
+    """
+    A fitted feature column_transformer baked into NumPy lookup arrays.
+
+    Produces the same design matrix as column_transformer.transform in one vectorized pass.
+    All fitted state lives in the 'state' dict of NumPy arrays, so it can be saved and memory-mapped.
+    """
+
+    def __init__(self, state):
+        self.state = state
+        self.columns = [str(col) for col in state['columns']]
+        self.feature_names = [str(name) for name in state['feature_names']]
+
+    @classmethod
+    def from_column_transformer(cls, column_transformer):
+        """
+        Compile a fitted column_transformer as defined in src/scripts/model_training.py.
+
+        Parameters:
+            column_transformer (ColumnTransformer): The fitted column transformer.
+
+        Returns:
+            CompiledTransformer: The compiled transformer.
+        """
+        from src.scripts.model_training import NORTH_CITIES
+
+        transformers = _fitted_transformers(column_transformer)
+        expected = {
+            'airline_transformer', 'date_transformer', 'location_union_transformer',
+            'time_union_transformer', 'duration_log_transformer', 'total_stops_transformer'
+        }
+        if set(transformers) != expected:
+            raise ValueError(f"Cannot compile transformers {sorted(transformers)}, expected {sorted(expected)}.")
+
+        state = {}
+
+        # Airline: rare label grouping + one-hot encoding, tabulated per frequent label plus 'other'
+        airline_pipeline, (airline_col,) = transformers['airline_transformer']
+        airline_labels = airline_pipeline['grouper'].encoder_dict_[airline_col] + ['other']
+        state['airline_labels'] = np.array(airline_labels[:-1], dtype=str)
+        state['airline_table'] = _label_table(airline_pipeline, [airline_col], [airline_labels])
+        airline_names = [f'{airline_col}_{category}' for category in airline_pipeline['encoder'].categories_[0]]
+
+        # Date: month, day of week and day of year, min-max scaled
+        date_pipeline, (date_col,) = transformers['date_transformer']
+        state['date_scale'], state['date_min'] = _min_max(date_pipeline['min_max_scaler'])
+        date_names = list(date_pipeline['date_to_features'].features_to_extract_)
+
+        # Source and destination: rare label grouping + mean encoding + power transform, tabulated per label
+        location_union, location_cols = transformers['location_union_transformer']
+        location_pipeline = dict(location_union.transformer_list)['location_transformer']
+        location_labels = [
+            location_pipeline['grouper'].encoder_dict_[col] + ['other'] for col in location_cols
+        ]
+        location_table = _label_table(location_pipeline, location_cols, location_labels)
+        for i, (col, labels) in enumerate(zip(location_cols, location_labels)):
+            state[f'{col}_labels'] = np.array(labels[:-1], dtype=str)
+            state[f'{col}_table'] = location_table[:len(labels), i].copy()
+        state['north_cities'] = np.array(sorted(NORTH_CITIES), dtype=str)
+        location_names = list(location_cols) + [f'{col}_is_north' for col in location_cols]
+
+        # Times: hour and minute min-max scaled, and part of day tabulated per hour
+        time_union, time_cols = transformers['time_union_transformer']
+        time_transformers = dict(time_union.transformer_list)
+        state['clock_scale'], state['clock_min'] = _min_max(time_transformers['time_transformer']['scaler'])
+        hours = [[f'{hour:02d}:00:00' for hour in HOURS]] * len(time_cols)
+        part_of_day_table = _label_table(time_transformers['part_of_day_transformer'], time_cols, hours)
+        for i, col in enumerate(time_cols):
+            state[f'{col}_part_of_day'] = part_of_day_table[:, i].copy()
+        time_names = (
+            [f'{col}_{feature}' for col in time_cols for feature in ('hour', 'minute')]
+            + [f'{col}_part_of_day' for col in time_cols]
+        )
+
+        _, (duration_col,) = transformers['duration_log_transformer']
+        _, (stops_col,) = transformers['total_stops_transformer']
+
+        state['columns'] = np.array(
+            [airline_col, date_col, *location_cols, *time_cols, duration_col, stops_col], dtype=str
+        )
+        state['feature_names'] = np.array(
+            airline_names + date_names + location_names + time_names + [duration_col, stops_col, 'is_direct_flight'],
+            dtype=str
+        )
+        return cls(state)
+
+    def transform(self, X):
+        """
+        Transform the input columns into the design matrix.
+
+        Parameters:
+            X (pd.DataFrame or dict): The input columns, indexable by column name.
+
+        Returns:
+            np.ndarray: The float64 design matrix, one row per input row.
+        """
+        state = self.state
+        airline_col, date_col, source_col, destination_col, dep_col, arrival_col, duration_col, stops_col = self.columns
+        n_rows = len(X[airline_col])
+        out = np.empty((n_rows, len(self.feature_names)), dtype=np.float64)
+
+        # Airline one-hot block
+        n_airline = state['airline_table'].shape[1]
+        out[:, :n_airline] = state['airline_table'][_codes(X[airline_col], state['airline_labels'])]
+        i = n_airline
+
+        # Date block: month, day of week (Monday=0) and day of year
+        days = _to_days(X[date_col])
+        date_features = np.empty((n_rows, 3), dtype=np.float64)
+        date_features[:, 0] = days.astype('datetime64[M]').astype(np.int64) % 12 + 1
+        date_features[:, 1] = (days.astype(np.int64) + 3) % 7
+        date_features[:, 2] = (days - days.astype('datetime64[Y]')).astype(np.int64) + 1
+        date_features *= state['date_scale']
+        date_features += state['date_min']
+        out[:, i:i + 3] = date_features
+        i += 3
+
+        # Location block: encoded source and destination, then the is-north flags
+        for col in (source_col, destination_col):
+            out[:, i] = state[f'{col}_table'][_codes(X[col], state[f'{col}_labels'])]
+            i += 1
+        for col in (source_col, destination_col):
+            out[:, i] = np.isin(np.asarray(X[col], dtype=object).astype(str), state['north_cities'])
+            i += 1
+
+        # Time block: hour and minute of each column, then part of day of each column
+        hours = {}
+        clock = np.empty((n_rows, 4), dtype=np.float64)
+        for j, col in enumerate((dep_col, arrival_col)):
+            minutes = _minute_of_day(X[col])
+            hours[col] = minutes // 60
+            clock[:, 2 * j] = hours[col]
+            clock[:, 2 * j + 1] = minutes % 60
+        clock *= state['clock_scale']
+        clock += state['clock_min']
+        out[:, i:i + 4] = clock
+        i += 4
+        for col in (dep_col, arrival_col):
+            out[:, i] = state[f'{col}_part_of_day'][hours[col]]
+            i += 1
+
+        # Duration and stops block
+        out[:, i] = np.log(np.asarray(X[duration_col], dtype=np.float64))
+        stops = np.asarray(X[stops_col], dtype=np.float64)
+        out[:, i + 1] = stops
+        out[:, i + 2] = stops == 0
+
+        return out
+
+class CompiledPipeline:
+    """
+    A fitted pipeline whose preprocessor is replaced by its CompiledTransformer.
+    """
+
+    def __init__(self, transformer, model):
+        self.transformer = transformer
+        self.model = model
+
+    def predict(self, X):
+        """
+        Make predictions with the compiled preprocessor and the fitted model.
+
+        Parameters:
+            X (pd.DataFrame or dict): The input columns, indexable by column name.
+
+        Returns:
+            np.ndarray: The predicted values.
+        """
+        return self.model.predict(self.transformer.transform(X))
+
+def compile_pipeline(pipeline):
+    """
+    Compile the preprocessor of a fitted pipeline ('preprocessor' step followed by a model).
+
+    Parameters:
+        pipeline (Pipeline): The fitted pipeline.
+
+    Returns:
+        CompiledPipeline: The pipeline with a compiled preprocessor.
+    """
+    return CompiledPipeline(CompiledTransformer.from_column_transformer(pipeline[0]), pipeline[-1])
+
+def compare_with_sklearn(column_transformer, X):
+    """
+    Compare the compiled transformer against the sklearn column_transformer on the same input.
+
+    Parameters:
+        column_transformer (ColumnTransformer): The fitted column transformer.
+        X (pd.DataFrame): The input data.
+
+    Returns:
+        float: The maximum absolute difference between the two design matrices (NaNs must match).
+    """
+    expected = column_transformer.transform(X)
+    result = CompiledTransformer.from_column_transformer(column_transformer).transform(X)
+    if expected.shape != result.shape or not np.array_equal(np.isnan(expected), np.isnan(result)):
+        return np.inf
+    return float(np.nanmax(np.abs(expected - result), initial=0.0))
@@ -1,5 +1,13 @@
-import pandas as pd    
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from src.utils.parsing import parse_unique
+from src.utils.profiling import profiled
 
+# Number of raw rows read per chunk by clean_csv
+CHUNK_SIZE = 100_000
+
+@profiled('clean_df.clean_column_names')
 def clean_column_names(df):
     """
     Convert all column names to lowercase for consistency.
@@ -16,6 +24,7 @@ def clean_column_names(df):
         print(f"An error occurred while cleaning column names: {e}")
         return df
 
+@profiled('clean_df.strip_string_columns')
 def strip_string_columns(df):
     """
     Strip leading and trailing whitespace from all string columns.
@@ -35,6 +44,7 @@ def strip_string_columns(df):
         print(f"An error occurred while stripping string columns: {e}")
         return df
 
+@profiled('clean_df.clean_airline_names')
 def clean_airline_names(df):
     """
     Clean and standardize 'airline' column by removing specific substrings and title-casing.
@@ -57,6 +67,7 @@ def clean_airline_names(df):
         print(f"An error occurred while cleaning airline names: {e}")
         return df
 
+@profiled('clean_df.convert_dates')
 def convert_dates(df):
     """
     Convert 'date_of_journey' column to datetime format, assuming day-first format.
@@ -68,12 +79,13 @@ def convert_dates(df):
         pd.DataFrame: The DataFrame with converted 'date_of_journey' column.
     """
     try:
-        df['date_of_journey'] = pd.to_datetime(df['date_of_journey'], dayfirst=True)
+        df['date_of_journey'] = parse_unique(df['date_of_journey'], lambda ser: pd.to_datetime(ser, dayfirst=True))
         return df
     except Exception as e:
         print(f"An error occurred while converting dates: {e}")
         return df
 
+@profiled('clean_df.convert_times')
 def convert_times(df):
     """
     Convert 'dep_time' and 'arrival_time' columns to time format.
@@ -85,13 +97,34 @@ def convert_times(df):
         pd.DataFrame: The DataFrame with converted time columns.
     """
     try:
-        df['dep_time'] =  pd.to_datetime(df['dep_time'], format='mixed').dt.time
-        df['arrival_time'] = pd.to_datetime(df['arrival_time'], format='mixed').dt.time
+        df['dep_time'] = parse_unique(df['dep_time'], lambda ser: pd.to_datetime(ser, format='mixed').dt.time)
+        df['arrival_time'] = parse_unique(df['arrival_time'], lambda ser: pd.to_datetime(ser, format='mixed').dt.time)
         return df
     except Exception as e:
         print(f"An error occurred while converting times: {e}")
         return df
 
+def duration_to_minutes(ser):
+    """
+    Convert durations such as '2h 50m' or '19h' to total minutes.
+
+    Parameters:
+        ser (pd.Series): The durations to convert.
+
+    Returns:
+        pd.Series: The durations in minutes.
+    """
+    duration_split = (
+        ser
+        .str.split(" ", expand=True)
+        .reindex(columns=[0, 1])
+        .set_axis(["hour", "minute"], axis=1)
+    )
+    duration_split['hour'] = duration_split['hour'].str.replace("h", "").astype(int).mul(60)
+    duration_split['minute'] = duration_split['minute'].str.replace("m", "").fillna("0").astype(int)
+    return duration_split.sum(axis=1)
+
+@profiled('clean_df.convert_duration')
 def convert_duration(df):
     """
     Convert 'duration' column to total minutes.
@@ -103,16 +136,14 @@ def convert_duration(df):
         pd.DataFrame: The DataFrame with converted 'duration' column.
     """
     try:
-        duration_split = df['duration'].str.split(" ", expand=True).set_axis(["hour", "minute"], axis=1)
-        duration_split['hour'] = duration_split['hour'].str.replace("h", "").astype(int).mul(60)
-        duration_split['minute'] = duration_split['minute'].str.replace("m", "").fillna("0").astype(int)
-        df['duration_minute'] = duration_split.sum(axis=1)
+        df['duration_minute'] = parse_unique(df['duration'], duration_to_minutes)
         df = df.drop(columns=['duration'])
         return df
     except Exception as e:
         print(f"An error occurred while converting duration: {e}")
         return df
 
+@profiled('clean_df.convert_total_stops')
 def convert_total_stops(df):
     """
     Standardize and convert 'total_stops' column to numeric.
@@ -135,6 +166,7 @@ def convert_total_stops(df):
         print(f"An error occurred while converting total stops: {e}")
         return df
 
+@profiled('clean_df.lower_additional_info')
 def lower_additional_info(df):
     """
     Convert 'additional_info' column to lowercase.
@@ -152,33 +184,94 @@ def lower_additional_info(df):
         print(f"An error occurred while converting additional_info: {e}")
         return df
 
-def clean_df(df):
+def drop_invalid_rows(df):
+    """
+    Drop rows with an invalid '5m' duration and the unused 'Route' column.
+
+    Parameters:
+        df (pd.DataFrame): The raw DataFrame.
+
+    Returns:
+        pd.DataFrame: The DataFrame without invalid rows and the 'Route' column.
+    """
+    return df.drop(index=df[df['Duration'].isin(['5m'])].index, columns=['Route'])
+
+def apply_cleaning_steps(df):
+    """
+    Apply the row-wise cleaning and conversion steps in sequence.
+
+    Parameters:
+        df (pd.DataFrame): The DataFrame to clean.
+
+    Returns:
+        pd.DataFrame: The cleaned DataFrame.
+    """
+    df = clean_column_names(df)
+    df = strip_string_columns(df)
+    df = clean_airline_names(df)
+    df = convert_dates(df)
+    df = convert_times(df)
+    df = convert_duration(df)
+    df = convert_total_stops(df)
+    df = lower_additional_info(df)
+    return df
+
+@profiled('clean_df.compact_dtypes')
+def compact_dtypes(df):
+    """
+    Store the cleaned columns in memory-lean dtypes.
+
+    Strings become categoricals, times become datetime64 on 1900-01-01 (the date pd.to_datetime gives to
+    'HH:MM:SS' strings) and integers are narrowed. duration_minute is kept at int32 so that np.log still
+    returns float64.
+
+    Parameters:
+        df (pd.DataFrame): The cleaned DataFrame.
+
+    Returns:
+        pd.DataFrame: The DataFrame with compact dtypes.
+    """
+    try:
+        for col in ['dep_time', 'arrival_time']:
+            df[col] = parse_unique(df[col], lambda ser: pd.to_datetime(ser.astype(str), format='%H:%M:%S'))
+        return df.astype({
+            'airline': 'category',
+            'source': 'category',
+            'destination': 'category',
+            'additional_info': 'category',
+            'duration_minute': 'int32',
+            'total_stops': 'int8',
+            'price': 'int32',
+        })
+    except Exception as e:
+        print(f"An error occurred while compacting dtypes: {e}")
+        return df
+
+@profiled('clean_df')
+def clean_df(df, compact=False):
     """
     Apply all preprocessing steps in sequence to clean and standardize the DataFrame.
 
     Parameters:
         df (pd.DataFrame): The DataFrame to clean.
+        compact (bool): Whether to return memory-lean dtypes (see compact_dtypes).
 
     Returns:
         pd.DataFrame: The cleaned DataFrame.
     """
     try:
-        df = df.drop(index=df[df['Duration'].isin(['5m'])].index, columns=['Route'])
+        df = drop_invalid_rows(df)
         df = df.drop_duplicates()
         df = df.dropna()
 
-        df = clean_column_names(df)
-        df = strip_string_columns(df)
-        df = clean_airline_names(df)
-        df = convert_dates(df)
-        df = convert_times(df)
-        df = convert_duration(df)
-        df = convert_total_stops(df)
-        df = lower_additional_info(df)
+        df = apply_cleaning_steps(df)
 
         df = df.drop_duplicates()
         df = df.dropna()
 
+        if compact:
+            df = compact_dtypes(df)
+
         return df
     except KeyError as e:
         print(f"Key error during cleaning process: {e}")
@@ -186,3 +279,101 @@ def clean_df(df):
     except Exception as e:
         print(f"An error occurred during the cleaning process: {e}")
         return df
+
+def row_hashes(df):
+    """
+    Compute a 64-bit hash per row, independent of the index and of int/float inference per chunk.
+
+    Parameters:
+        df (pd.DataFrame): The DataFrame to hash.
+
+    Returns:
+        np.ndarray: The uint64 hash of each row.
+    """
+    numeric_columns = df.select_dtypes(include='number').columns
+    normalized = df.astype({col: 'float64' for col in numeric_columns})
+    return pd.util.hash_pandas_object(normalized, index=False).to_numpy()
+
+def drop_seen_rows(df, seen):
+    """
+    Drop rows that are duplicates within the chunk or of rows seen in earlier chunks, keeping the first occurrence.
+
+    Parameters:
+        df (pd.DataFrame): The chunk to deduplicate.
+        seen (np.ndarray): The sorted uint64 hashes of the rows kept so far.
+
+    Returns:
+        tuple: The deduplicated chunk and the updated sorted hashes.
+    """
+    hashes = row_hashes(df)
+    keep = ~pd.Series(hashes).duplicated().to_numpy()
+
+    if len(seen) > 0:
+        positions = np.searchsorted(seen, hashes).clip(max=len(seen) - 1)
+        keep &= seen[positions] != hashes
+
+    seen = np.sort(np.concatenate([seen, hashes[keep]]))
+    return df[keep], seen
+
+def clean_csv(input_file_name, output_file_name, chunk_size=CHUNK_SIZE):
+    """
+    Clean a raw CSV file chunk by chunk and write the result incrementally.
+
+    Applies the same steps as clean_df. Duplicates are dropped across the whole file by tracking
+    row hashes, so peak memory is one chunk plus 8 bytes per distinct row.
+
+    Parameters:
+        input_file_name (str): The name of the raw CSV file in the 'data' directory.
+        output_file_name (str): The name of the cleaned CSV file to write in the 'data' directory.
+        chunk_size (int): The number of raw rows read per chunk.
+
+    Returns:
+        int: The number of cleaned rows written, or None if an error occurred.
+    """
+    try:
+        # Get the path to the current script
+        current_dir = Path(__file__).resolve().parent
+
+        # Navigate to the project root directory
+        project_root = current_dir.parent.parent
+
+        input_path = project_root / 'data' / input_file_name
+        output_path = project_root / 'data' / output_file_name
+
+        raw_seen = np.empty(0, dtype=np.uint64)
+        clean_seen = np.empty(0, dtype=np.uint64)
+        n_rows = 0
+
+        for chunk in pd.read_csv(input_path, chunksize=chunk_size):
+            chunk = drop_invalid_rows(chunk)
+            chunk, raw_seen = drop_seen_rows(chunk, raw_seen)
+            chunk = chunk.dropna()
+            if chunk.empty:
+                continue
+
+            chunk = apply_cleaning_steps(chunk)
+
+            chunk, clean_seen = drop_seen_rows(chunk, clean_seen)
+            chunk = chunk.dropna()
+
+            chunk.to_csv(output_path, mode='w' if n_rows == 0 else 'a', header=n_rows == 0, index=False)
+            n_rows += len(chunk)
+
+        if n_rows == 0:
+            # Do not leave an earlier output in place that could be mistaken for this run's
+            output_path.unlink(missing_ok=True)
+            print(f"No rows left after cleaning '{input_file_name}'. File '{output_file_name}' was not saved.")
+            return 0
+
+        print(f"File '{output_file_name}' saved successfully.")
+        return n_rows
+
+    except FileNotFoundError:
+        print(f"File '{input_file_name}' not found.")
+        return None
+    except KeyError as e:
+        print(f"Key error during cleaning process: {e}")
+        return None
+    except Exception as e:
+        print(f"An error occurred during the cleaning process: {e}")
+        return None
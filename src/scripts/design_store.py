@@ -0,0 +1,203 @@
+import hashlib
+import json
+import pickle
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from src.scripts.compiled_transformer import CompiledTransformer
+from src.utils.stage_cache import code_hash
+
+# Version of the on-disk layout written by write_design
+FORMAT_VERSION = 2
+
+# Number of rows transformed and written per chunk by write_design
+CHUNK_SIZE = 100_000
+
+def store_path(split_name):
+    """
+    Get the path of a split's design matrix directory inside 'data/design'.
+
+    Parameters:
+        split_name (str): The name of the split (e.g., 'train', 'validation', 'test').
+
+    Returns:
+        Path: The path to the design matrix directory.
+    """
+    # Get the path to the current script
+    current_dir = Path(__file__).resolve().parent
+
+    # Navigate to the project root directory
+    project_root = current_dir.parent.parent
+
+    return project_root / 'data' / 'design' / split_name
+
+def preprocessor_fingerprint(preprocessor):
+    """
+    Fingerprint a fitted preprocessor by its pickled state and the code of its custom functions.
+
+    The pickle covers the transformer definition, parameters and fitted state; the custom functions
+    are pickled by reference, so their source code is hashed as well.
+
+    Parameters:
+        preprocessor (ColumnTransformer): The fitted column transformer.
+
+    Returns:
+        str: The hex digest.
+    """
+    # Imported here, as model_training reads its design matrices from this module
+    from src.scripts.model_training import is_direct_flight, is_north, part_of_day
+
+    digest = hashlib.sha256(pickle.dumps(preprocessor))
+    digest.update(code_hash(is_north, part_of_day, is_direct_flight).encode())
+    return digest.hexdigest()
+
+def data_fingerprint(X, y=None):
+    """
+    Fingerprint the rows of a split by their number, the column names and a hash of every value.
+
+    Parameters:
+        X (pd.DataFrame): The features of the split.
+        y (pd.Series, optional): The target variable of the split.
+
+    Returns:
+        str: The hex digest.
+    """
+    digest = hashlib.sha256(json.dumps([len(X), [str(col) for col in X.columns]]).encode())
+    digest.update(pd.util.hash_pandas_object(X, index=False).to_numpy().tobytes())
+    if y is not None:
+        digest.update(pd.util.hash_pandas_object(pd.Series(y), index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+def _feature_names(preprocessor, n_features):
+    try:
+        return CompiledTransformer.from_column_transformer(preprocessor).feature_names
+    except Exception:
+        # Preprocessors the compiler does not know get positional names
+        return [f'feature_{i}' for i in range(n_features)]
+
+def write_design(split_name, preprocessor, X, y=None, chunk_size=CHUNK_SIZE):
+    """
+    Transform a split with a fitted preprocessor and persist it as a float32 memory-mappable matrix.
+
+    Rows are transformed chunk by chunk straight into the file, so peak memory is one chunk.
+    Decision trees split on float32 features, so tree models fitted or evaluated on the stored
+    matrix give the same results as on the float64 transform output.
+
+    Parameters:
+        split_name (str): The name of the split.
+        preprocessor (ColumnTransformer): The fitted column transformer.
+        X (pd.DataFrame): The features of the split, with times converted as for training.
+        y (pd.Series, optional): The target variable of the split.
+        chunk_size (int): The number of rows transformed per chunk.
+
+    Returns:
+        None
+    """
+    try:
+        path = store_path(split_name)
+        path.mkdir(parents=True, exist_ok=True)
+
+        first = np.asarray(preprocessor.transform(X.iloc[:chunk_size]), dtype=np.float32)
+        design = np.lib.format.open_memmap(path / 'X.npy', mode='w+', dtype=np.float32, shape=(len(X), first.shape[1]))
+        design[:len(first)] = first
+        for start in range(chunk_size, len(X), chunk_size):
+            design[start:start + chunk_size] = preprocessor.transform(X.iloc[start:start + chunk_size])
+        design.flush()
+        del design
+
+        if y is not None:
+            np.save(path / 'y.npy', np.asarray(y, dtype=np.float64))
+
+        meta = {
+            'version': FORMAT_VERSION,
+            'fingerprint': preprocessor_fingerprint(preprocessor),
+            'data_fingerprint': data_fingerprint(X, y),
+            'n_rows': len(X),
+            'feature_names': _feature_names(preprocessor, first.shape[1]),
+            'has_target': y is not None,
+        }
+        with open(path / 'meta.json', 'w') as file:
+            json.dump(meta, file, indent=2)
+
+        print(f"Design matrix '{split_name}' saved successfully ({len(X)} x {first.shape[1]}).")
+
+    except FileNotFoundError:
+        print(f"Directory not found. Failed to save the design matrix '{split_name}'.")
+    except Exception as e:
+        print(f"An error occurred while saving the design matrix: {e}")
+
+def read_design(split_name, preprocessor=None, X=None, y=None, mmap=True):
+    """
+    Read a stored design matrix, checking it was written by the given preprocessor from the given data.
+
+    Parameters:
+        split_name (str): The name of the split.
+        preprocessor (ColumnTransformer, optional): The fitted column transformer the matrix must come from.
+                                                    If None, the fingerprint is not checked.
+        X (pd.DataFrame, optional): The features the matrix must come from. If None, the data is not checked.
+        y (pd.Series, optional): The target variable stored with the matrix (checked with X).
+        mmap (bool): Whether to memory-map the matrix (read-only).
+
+    Returns:
+        tuple: The float32 design matrix, the target (or None) and the feature names,
+               or None if the matrix is missing or stale.
+    """
+    path = store_path(split_name)
+    try:
+        with open(path / 'meta.json') as file:
+            meta = json.load(file)
+    except FileNotFoundError:
+        return None
+
+    if meta['version'] != FORMAT_VERSION:
+        return None
+    if preprocessor is not None and meta['fingerprint'] != preprocessor_fingerprint(preprocessor):
+        return None
+    if X is not None and (meta['n_rows'] != len(X) or meta['data_fingerprint'] != data_fingerprint(X, y)):
+        return None
+
+    mmap_mode = 'r' if mmap else None
+    X = np.load(path / 'X.npy', mmap_mode=mmap_mode)
+    y = np.load(path / 'y.npy', mmap_mode=mmap_mode) if meta['has_target'] else None
+    return X, y, meta['feature_names']
+
+def get_design(split_name, preprocessor, X, y=None, chunk_size=CHUNK_SIZE):
+    """
+    Read a split's design matrix, (re)building it first if it is missing or the preprocessor or data changed.
+
+    Parameters:
+        split_name (str): The name of the split.
+        preprocessor (ColumnTransformer): The fitted column transformer.
+        X (pd.DataFrame): The features of the split, checked against the stored matrix and used if it has to be built.
+        y (pd.Series, optional): The target variable of the split.
+        chunk_size (int): The number of rows transformed per chunk.
+
+    Returns:
+        tuple: The float32 design matrix, the target (or None) and the feature names.
+    """
+    stored = read_design(split_name, preprocessor, X, y)
+    if stored is None:
+        write_design(split_name, preprocessor, X, y, chunk_size)
+        stored = read_design(split_name, preprocessor, X, y)
+    return stored
+
+def predict_split(model, split_name, X, y=None):
+    """
+    Predict a split with a fitted pipeline, reading the transformed split from the design store.
+
+    Only random forests are fed the stored float32 matrix, as they split on float32 features anyway;
+    other models (e.g. HistGradientBoostingRegressor, which bins float64 values) go through model.predict.
+
+    Parameters:
+        model (Pipeline): The fitted pipeline ('preprocessor' step followed by the model).
+        split_name (str): The name of the split in the design store.
+        X (pd.DataFrame): The features of the split, with times converted as for training.
+        y (pd.Series, optional): The target variable of the split, stored with the matrix.
+
+    Returns:
+        np.ndarray: The predicted values.
+    """
+    if not hasattr(model[-1], 'estimators_'):
+        return model.predict(X)
+    design, _, _ = get_design(split_name, model[0], X, y)
+    return model[-1].predict(design)
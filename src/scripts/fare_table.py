@@ -0,0 +1,230 @@
+import json
+import numpy as np
+import pandas as pd
+from itertools import product
+from pathlib import Path
+from src.scripts.model_prediction import MODEL_NAME, get_predictor
+from src.scripts.prediction_cache import QUERY_COLUMNS, canonicalize
+from src.utils.model_registry import model_signature
+from src.utils.serving_metrics import observed_predict
+
+# Columns identifying a schedule: every model input except the date of journey
+SCHEDULE_COLUMNS = [col for col in QUERY_COLUMNS if col != 'date_of_journey']
+
+# Number of dates scored per model.predict call while building a table
+DATES_PER_BATCH = 7
+
+def table_path(table_name):
+    """
+    Get the path of a fare table directory inside the 'models' directory.
+
+    Parameters:
+        table_name (str): The name of the fare table.
+
+    Returns:
+        Path: The path to the fare table directory.
+    """
+    # Get the path to the current script
+    current_dir = Path(__file__).resolve().parent
+
+    # Navigate to the project root directory
+    project_root = current_dir.parent.parent
+
+    return project_root / 'models' / f'{table_name}.fares'
+
+def observed_schedules(df):
+    """
+    Get the distinct schedules (airline, route, times, duration and stops) present in a cleaned dataset.
+
+    Parameters:
+        df (pd.DataFrame): The cleaned data, e.g. the training features.
+
+    Returns:
+        pd.DataFrame: One row per distinct schedule, with SCHEDULE_COLUMNS.
+    """
+    keys = {key[:1] + key[2:] for key in canonicalize(df.assign(date_of_journey='2000-01-01'))}
+    return pd.DataFrame(sorted(keys), columns=SCHEDULE_COLUMNS)
+
+def schedule_grid(airlines, routes, stops, durations, dep_step_minutes=5):
+    """
+    Build a full grid of schedules: airlines x routes x departure-time buckets x durations x stops.
+
+    The arrival time of each schedule follows from its departure time and duration.
+
+    Parameters:
+        airlines (list): The airlines.
+        routes (list): The (source, destination) pairs.
+        stops (list): The numbers of stops.
+        durations (list): The flight durations in minutes.
+        dep_step_minutes (int): The width of the departure-time buckets in minutes.
+
+    Returns:
+        pd.DataFrame: One row per schedule, with SCHEDULE_COLUMNS.
+    """
+    rows = []
+    for airline, (source, destination), dep_minute, duration, n_stops in product(
+        airlines, routes, range(0, 1440, dep_step_minutes), durations, stops
+    ):
+        arrival_minute = (dep_minute + duration) % 1440
+        rows.append((
+            airline, source, destination,
+            f'{dep_minute // 60:02d}:{dep_minute % 60:02d}', f'{arrival_minute // 60:02d}:{arrival_minute % 60:02d}',
+            int(duration), int(n_stops)
+        ))
+    return pd.DataFrame(rows, columns=SCHEDULE_COLUMNS)
+
+def build_fare_table(schedules, start_date, horizon_days, table_name, model_name=MODEL_NAME):
+    """
+    Materialize predictions for every schedule on every date of the horizon and save them to disk.
+
+    The model file and its signature (modification time and size) are saved with the table, so a
+    table is not served next to a retrained model.
+
+    Parameters:
+        schedules (pd.DataFrame): The schedules to cover (see observed_schedules and schedule_grid).
+        start_date (str): The first date of the horizon ('YYYY-MM-DD').
+        horizon_days (int): The number of dates covered from start_date.
+        table_name (str): The name of the fare table to save.
+        model_name (str): The model file in the 'models' directory to build the table with.
+
+    Returns:
+        int: The number of cells in the table, or None if an error occurred.
+    """
+    try:
+        # The signature is read before the model, so a model replaced while building makes the table stale
+        signature = model_signature(model_name)
+        model = get_predictor('sklearn', model_name)
+        schedules = schedules[SCHEDULE_COLUMNS].drop_duplicates().reset_index(drop=True)
+        dates = pd.date_range(start_date, periods=horizon_days, freq='D').strftime('%Y-%m-%d')
+
+        # Query times as 'HH:MM:SS', the format of the cleaned data
+        queries = schedules.assign(
+            dep_time=schedules['dep_time'] + ':00',
+            arrival_time=schedules['arrival_time'] + ':00'
+        )
+
+        prices = np.empty((len(schedules), horizon_days), dtype=np.float32)
+        for start in range(0, horizon_days, DATES_PER_BATCH):
+            batch_dates = dates[start:start + DATES_PER_BATCH]
+            batch = pd.concat([queries.assign(date_of_journey=date) for date in batch_dates], ignore_index=True)
+            predictions = model.predict(batch[QUERY_COLUMNS])
+            prices[:, start:start + len(batch_dates)] = predictions.reshape(len(batch_dates), len(schedules)).T
+
+        path = table_path(table_name)
+        path.mkdir(parents=True, exist_ok=True)
+        np.save(path / 'prices.npy', prices)
+        with open(path / 'schedules.json', 'w') as file:
+            json.dump(schedules.values.tolist(), file)
+        with open(path / 'meta.json', 'w') as file:
+            json.dump({
+                'start_date': dates[0], 'horizon_days': horizon_days,
+                'model_name': model_name, 'model_signature': list(signature),
+            }, file, indent=2)
+
+        print(f"Fare table '{table_name}' saved successfully ({prices.size} cells).")
+        return prices.size
+
+    except FileNotFoundError as e:
+        print(f"Failed to build the fare table '{table_name}': {e}")
+    except Exception as e:
+        print(f"An error occurred while building the fare table: {e}")
+
+class FareTable:
+    """
+    Precomputed predictions indexed by schedule and date, with the live model as fallback.
+
+    The fallback is the model file the table was built from. A table whose model file has changed since
+    it was built is refused, and if the model changes while the table is loaded, every row is predicted
+    by the live model, so the two are never mixed.
+    """
+
+    def __init__(self, table_name, engine='sklearn'):
+        path = table_path(table_name)
+        with open(path / 'meta.json') as file:
+            meta = json.load(file)
+        self.model_name = meta['model_name']
+        self.model_signature = tuple(meta['model_signature'])
+        if self.is_stale():
+            raise ValueError(
+                f"Fare table '{table_name}' was built with another version of '{self.model_name}'. Rebuild it."
+            )
+        with open(path / 'schedules.json') as file:
+            self.schedule_index = {tuple(key): i for i, key in enumerate(json.load(file))}
+
+        self.prices = np.load(path / 'prices.npy', mmap_mode='r')
+        self.start_date = np.datetime64(meta['start_date'], 'D')
+        self.horizon_days = meta['horizon_days']
+        self.engine = engine
+        self.stats = {'hits': 0, 'misses': 0}
+        self.warned = False
+
+    def is_stale(self):
+        """
+        Check whether the model file has changed since the table was built.
+
+        Parameters:
+            None
+
+        Returns:
+            bool: True if the table's prices come from another version of the model.
+        """
+        return model_signature(self.model_name) != self.model_signature
+
+    def lookup(self, query):
+        """
+        Look up the precomputed prediction of each query row.
+
+        Parameters:
+            query (pd.DataFrame): The queries, with the 8 model input columns.
+
+        Returns:
+            np.ndarray: The predictions, NaN for rows outside the grid.
+        """
+        results = np.full(len(query), np.nan)
+        for i, key in enumerate(canonicalize(query)):
+            row = self.schedule_index.get(key[:1] + key[2:])
+            day = (np.datetime64(key[1], 'D') - self.start_date).astype(int)
+            if row is not None and 0 <= day < self.horizon_days:
+                results[i] = self.prices[row, day]
+        return results
+
+    def predict(self, query):
+        """
+        Make predictions from the table, falling back to the live model for rows outside the grid.
+
+        If the model has changed since the table was built, every row is predicted by the live model.
+
+        Parameters:
+            query (pd.DataFrame): The queries, with the 8 model input columns.
+
+        Returns:
+            np.ndarray: The predicted values.
+        """
+        if self.is_stale():
+            if not self.warned:
+                print(f"Warning: '{self.model_name}' changed since the fare table was built. Using the live model only.")
+                self.warned = True
+            results = np.full(len(query), np.nan)
+        else:
+            results = self.lookup(query)
+        missing = np.isnan(results)
+        n_missing = int(missing.sum())
+        self.stats['hits'] += len(results) - n_missing
+        self.stats['misses'] += n_missing
+
+        if n_missing:
+            results[missing] = observed_predict(get_predictor(self.engine, self.model_name), query[missing][QUERY_COLUMNS])
+        return results
+
+    def coverage(self):
+        """
+        Get the share of queries served from the table so far.
+
+        Parameters:
+            None
+
+        Returns:
+            dict: The hit and miss counts and the coverage.
+        """
+        lookups = self.stats['hits'] + self.stats['misses']
+        return {**self.stats, 'coverage': self.stats['hits'] / lookups if lookups else 0.0}
@@ -0,0 +1,109 @@
+import numpy as np
+
+class ForestEngine:
+    """
+    A fitted RandomForestRegressor flattened into contiguous node arrays.
+
+    All trees share one set of arrays (feature, threshold, children, value); each tree starts at its
+    entry in 'roots'. Leaves point to themselves, so every row can be advanced through all trees at
+    once for a fixed number of steps.
+    """
+
+    def __init__(self, arrays):
+        self.arrays = arrays
+        self.n_trees = len(arrays['roots'])
+        self.n_steps = int(arrays['n_steps'])
+
+    @classmethod
+    def from_random_forest(cls, forest, dtype=np.float64):
+        """
+        Flatten the trees of a fitted RandomForestRegressor.
+
+        Parameters:
+            forest (RandomForestRegressor): The fitted forest (single output).
+            dtype (np.dtype): The dtype of the stored thresholds and leaf values (np.float64 or np.float32).
+
+        Returns:
+            ForestEngine: The flattened forest.
+        """
+        if getattr(forest, 'n_outputs_', 1) != 1:
+            raise ValueError("Only single-output forests are supported.")
+
+        features, thresholds, lefts, rights, missing_left, values, roots = [], [], [], [], [], [], []
+        offset = 0
+        n_steps = 0
+        for estimator in forest.estimators_:
+            tree = estimator.tree_
+            nodes = np.arange(tree.node_count)
+            is_leaf = tree.children_left == -1
+
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+            lefts.append(np.where(is_leaf, nodes, tree.children_left) + offset)
+            rights.append(np.where(is_leaf, nodes, tree.children_right) + offset)
+            missing_left.append(getattr(tree, 'missing_go_to_left', np.zeros(tree.node_count, dtype=np.uint8)).astype(bool))
+            values.append(tree.value[:, 0, 0])
+            roots.append(offset)
+
+            offset += tree.node_count
+            n_steps = max(n_steps, tree.max_depth)
+
+        thresholds = np.concatenate(thresholds)
+        if dtype == np.float32:
+            # Inputs are compared as float32, so rounding each threshold down keeps every split exact
+            rounded = thresholds.astype(np.float32)
+            too_high = rounded.astype(np.float64) > thresholds
+            rounded[too_high] = np.nextafter(rounded[too_high], np.float32(-np.inf))
+            thresholds = rounded
+
+        arrays = {
+            'feature': np.concatenate(features).astype(np.int32),
+            'threshold': thresholds,
+            'left': np.concatenate(lefts).astype(np.int32),
+            'right': np.concatenate(rights).astype(np.int32),
+            'missing_left': np.concatenate(missing_left),
+            'value': np.concatenate(values).astype(dtype),
+            'roots': np.array(roots, dtype=np.int32),
+            'n_steps': np.array(n_steps, dtype=np.int32),
+        }
+        return cls(arrays)
+
+    def apply(self, X):
+        """
+        Find the leaf reached by each row in each tree.
+
+        Parameters:
+            X (np.ndarray): The design matrix, shape (n_rows, n_features).
+
+        Returns:
+            np.ndarray: The global leaf indices, shape (n_rows, n_trees).
+        """
+        arrays = self.arrays
+        # Trees compare float32 inputs, as sklearn does
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        n_rows, n_features = X.shape
+        flat_X = X.ravel()
+        row_offsets = (np.arange(n_rows) * n_features)[:, None]
+        has_missing = np.isnan(flat_X).any()
+
+        nodes = np.broadcast_to(arrays['roots'], (n_rows, self.n_trees))
+        for _ in range(self.n_steps):
+            x = flat_X[row_offsets + arrays['feature'][nodes]]
+            go_left = x <= arrays['threshold'][nodes]
+            if has_missing:
+                go_left |= np.isnan(x) & arrays['missing_left'][nodes]
+            nodes = np.where(go_left, arrays['left'][nodes], arrays['right'][nodes])
+        return nodes
+
+    def predict(self, X):
+        """
+        Predict by averaging the leaf values of all trees.
+
+        Parameters:
+            X (np.ndarray): The design matrix, shape (n_rows, n_features).
+
+        Returns:
+            np.ndarray: The predicted values.
+        """
+        leaf_values = self.arrays['value'][self.apply(X)].astype(np.float64)
+        return leaf_values.sum(axis=1) / self.n_trees
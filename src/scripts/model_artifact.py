@@ -0,0 +1,121 @@
+import json
+import numpy as np
+from pathlib import Path
+from src.scripts.compiled_transformer import CompiledPipeline, CompiledTransformer
+from src.scripts.forest_engine import ForestEngine
+from src.utils.model_registry import model_signature
+
+# Version of the on-disk layout written by save_artifact
+FORMAT_VERSION = 1
+
+def artifact_path(model_name):
+    """
+    Get the path of a model artifact directory inside the 'models' directory.
+
+    Parameters:
+        model_name (str): The name of the model (without extension).
+
+    Returns:
+        Path: The path to the artifact directory.
+    """
+    # Get the path to the current script
+    current_dir = Path(__file__).resolve().parent
+
+    # Navigate to the project root directory
+    project_root = current_dir.parent.parent
+
+    return project_root / 'models' / f'{model_name}.artifact'
+
+def save_artifact(pipeline, model_name, dtype=np.float64):
+    """
+    Save a fitted RandomForestRegressor pipeline as a directory of NumPy buffers.
+
+    The compiled preprocessing state and the flattened forest are stored as one .npy file per array,
+    so they can be memory-mapped and shared between processes. The signature of the pickled model saved
+    under the same name is recorded, so an artifact left behind by a failed save is detected (see is_current).
+
+    Parameters:
+        pipeline (Pipeline): The fitted pipeline ('preprocessor' step followed by a RandomForestRegressor).
+        model_name (str): The name of the artifact to save (without extension).
+        dtype (np.dtype): The dtype of the tree thresholds and leaf values (np.float64 or np.float32).
+
+    Returns:
+        None
+    """
+    try:
+        transformer = CompiledTransformer.from_column_transformer(pipeline[0])
+        forest = ForestEngine.from_random_forest(pipeline[-1], dtype=dtype)
+
+        path = artifact_path(model_name)
+        path.mkdir(parents=True, exist_ok=True)
+        for prefix, arrays in (('transformer', transformer.state), ('forest', forest.arrays)):
+            for key, array in arrays.items():
+                np.save(path / f'{prefix}.{key}.npy', array)
+
+        meta = {
+            'version': FORMAT_VERSION,
+            'dtype': np.dtype(dtype).name,
+            'transformer': sorted(transformer.state),
+            'forest': sorted(forest.arrays),
+            'model_signature': model_signature(f'{model_name}.pkl'),
+        }
+        with open(path / 'meta.json', 'w') as file:
+            json.dump(meta, file, indent=2)
+
+        print(f"Model artifact '{model_name}.artifact' saved successfully.")
+
+    except FileNotFoundError:
+        print(f"Directory not found. Failed to save the model artifact '{model_name}.artifact'.")
+    except Exception as e:
+        print(f"An error occurred while saving the model artifact: {e}")
+
+def is_current(model_name):
+    """
+    Check whether a model artifact was saved from the current version of the pickled model of the same name.
+
+    Parameters:
+        model_name (str): The name of the artifact (without extension).
+
+    Returns:
+        bool: True if the artifact exists and matches the pickled model file.
+    """
+    try:
+        with open(artifact_path(model_name) / 'meta.json') as file:
+            saved = json.load(file).get('model_signature')
+    except (FileNotFoundError, ValueError):
+        return False
+
+    current = model_signature(f'{model_name}.pkl')
+    return saved is not None and current is not None and tuple(saved) == current
+
+def load_artifact(model_name, mmap=True):
+    """
+    Load a model artifact saved by save_artifact.
+
+    Parameters:
+        model_name (str): The name of the artifact to load (without extension).
+        mmap (bool): Whether to memory-map the arrays (read-only, shared between processes).
+
+    Returns:
+        CompiledPipeline: A predictor with a predict(X) method, or None if the artifact could not be loaded.
+    """
+    try:
+        path = artifact_path(model_name)
+        with open(path / 'meta.json') as file:
+            meta = json.load(file)
+
+        if meta['version'] != FORMAT_VERSION:
+            raise ValueError(f"Unsupported artifact format version: {meta['version']}")
+
+        mmap_mode = 'r' if mmap else None
+        transformer_state = {key: np.load(path / f'transformer.{key}.npy', mmap_mode=mmap_mode) for key in meta['transformer']}
+        forest_arrays = {key: np.load(path / f'forest.{key}.npy', mmap_mode=mmap_mode) for key in meta['forest']}
+
+        return CompiledPipeline(CompiledTransformer(transformer_state), ForestEngine(forest_arrays))
+
+    except FileNotFoundError:
+        print(f"Model artifact '{model_name}.artifact' not found.")
+        return None
+    except Exception as e:
+        print(f"An error occurred while loading the model artifact: {e}")
+        return None
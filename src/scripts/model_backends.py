@@ -0,0 +1,39 @@
+def _random_forest():
+    from sklearn.ensemble import RandomForestRegressor
+    return RandomForestRegressor(max_depth=20, max_features=0.5, n_estimators=150)
+
+def _hist_gradient_boosting():
+    from sklearn.ensemble import HistGradientBoostingRegressor
+    return HistGradientBoostingRegressor(max_iter=500, learning_rate=0.1, random_state=42)
+
+# Model backends trained on the column_transformer output: the estimator factory, the pipeline step
+# name and the name the trained model is saved under. sklearn is only imported by the factories, so
+# the backends can be listed (e.g. by the CLI) without loading it.
+BACKENDS = {
+    'random_forest': {
+        'estimator': _random_forest,
+        'step': 'RF',
+        'model_name': 'RandomForestRegressor',
+    },
+    'hist_gradient_boosting': {
+        'estimator': _hist_gradient_boosting,
+        'step': 'HGB',
+        'model_name': 'HistGradientBoostingRegressor',
+    },
+}
+
+DEFAULT_BACKEND = 'random_forest'
+
+def model_file_name(backend=DEFAULT_BACKEND):
+    """
+    Get the name of the file the trained model of a backend is saved to in the 'models' directory.
+
+    Parameters:
+        backend (str): The name of the backend in BACKENDS.
+
+    Returns:
+        str: The model file name (e.g., 'RandomForestRegressor.pkl').
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend '{backend}'. Expected one of {list(BACKENDS)}.")
+    return f"{BACKENDS[backend]['model_name']}.pkl"
@@ -1,5 +1,48 @@
+import os
 import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
 from sklearn.metrics import mean_squared_error, r2_score
+from src.scripts.design_store import predict_split
+
+# Columns the per-segment metrics are grouped by
+SEGMENTS = {
+    'airline': ['airline'],
+    'route': ['source', 'destination'],
+    'stops': ['total_stops'],
+}
+
+# Bootstrap resamples and confidence level of the metric intervals
+BOOTSTRAP_SAMPLES = 1000
+CONFIDENCE = 0.95
+
+# Upper bound on resampled values held at once by a bootstrap worker
+BOOTSTRAP_BATCH_VALUES = 10_000_000
+
+def compute_metrics(y, y_pred, n_features):
+    """
+    Compute the regression metrics reported by evaluation.
+
+    Parameters:
+        y (pd.Series or np.ndarray): The true values.
+        y_pred (np.ndarray): The predicted values.
+        n_features (int): The number of input features, used for the adjusted R-squared.
+
+    Returns:
+        dict: The 'r2', 'adj_r2' and 'rmse' metrics.
+    """
+    # Calculate R-squared
+    r2 = r2_score(y, y_pred)
+
+    # Calculate adjusted R-squared
+    n = len(y)
+    adj_r2 = 1 - (1 - r2) * (n - 1) / (n - n_features - 1)
+
+    # Calculate Root Mean Squared Error (RMSE)
+    rmse = np.sqrt(mean_squared_error(y, y_pred))
+
+    return {'r2': r2, 'adj_r2': adj_r2, 'rmse': rmse}
 
 def evaluation(model, type, X, y):
     """
@@ -18,21 +61,13 @@ def evaluation(model, type, X, y):
         # Predict the target variable using the model
         y_pred = model.predict(X)
         
-        # Calculate R-squared
-        r2 = r2_score(y, y_pred)
-        
-        # Calculate adjusted R-squared
-        n = len(y)
-        p = X.shape[1]
-        adj_r2 = 1 - (1 - r2) * (n - 1) / (n - p - 1)
-        
-        # Calculate Root Mean Squared Error (RMSE)
-        rmse = np.sqrt(mean_squared_error(y, y_pred))
+        # Calculate R-squared, adjusted R-squared and RMSE
+        metrics = compute_metrics(y, y_pred, X.shape[1])
         
         # Print evaluation metrics
-        print(f'{type} R^2: {r2:.4f}')
-        print(f'{type} Adjusted R^2: {adj_r2:.4f}')
-        print(f'{type} RMSE: {rmse:.4f}')
+        print(f'{type} R^2: {metrics["r2"]:.4f}')
+        print(f'{type} Adjusted R^2: {metrics["adj_r2"]:.4f}')
+        print(f'{type} RMSE: {metrics["rmse"]:.4f}')
     
     except AttributeError as e:
         print(f"Attribute error: {e}")
@@ -40,3 +75,144 @@ def evaluation(model, type, X, y):
         print(f"Value error: {e}")
     except Exception as e:
         print(f"An unexpected error occurred: {e}")
+
+@dataclass
+class SplitEvaluation:
+    """
+    The evaluation of a model on one split.
+
+    Attributes:
+        name (str): The name of the split.
+        n_rows (int): The number of rows.
+        metrics (dict): The 'r2', 'adj_r2' and 'rmse' metrics.
+        intervals (dict): The (low, high) bootstrap confidence interval of 'r2' and 'rmse'.
+        segments (dict): One DataFrame of metrics per segment in SEGMENTS.
+    """
+    name: str
+    n_rows: int
+    metrics: dict
+    intervals: dict = field(default_factory=dict)
+    segments: dict = field(default_factory=dict)
+
+def segment_metrics(X, y, y_pred, columns):
+    """
+    Compute the number of rows, R-squared, RMSE, MAE and mean error of each group, in one grouped pass.
+
+    Parameters:
+        X (pd.DataFrame): The features holding the grouping columns.
+        y (pd.Series or np.ndarray): The true values.
+        y_pred (np.ndarray): The predicted values.
+        columns (list): The columns to group by.
+
+    Returns:
+        pd.DataFrame: One row per group, sorted by the number of rows.
+    """
+    y = np.asarray(y, dtype=float)
+    error = y_pred - y
+    sums = (
+        pd.DataFrame({'n': 1, 'y': y, 'y2': y ** 2, 'error': error, 'error2': error ** 2, 'abs_error': np.abs(error)})
+        .groupby([X[col].to_numpy() for col in columns], observed=True)
+        .sum()
+        .rename_axis(columns)
+    )
+    total_sum_squares = sums['y2'] - sums['y'] ** 2 / sums['n']
+    with np.errstate(divide='ignore', invalid='ignore'):
+        r2 = 1 - sums['error2'] / total_sum_squares
+    return pd.DataFrame({
+        'n': sums['n'],
+        'r2': r2.where(total_sum_squares > 0),
+        'rmse': np.sqrt(sums['error2'] / sums['n']),
+        'mae': sums['abs_error'] / sums['n'],
+        'mean_error': sums['error'] / sums['n'],
+    }).sort_values('n', ascending=False)
+
+# True and predicted values shared by the bootstrap workers
+_bootstrap_data = {}
+
+def _init_bootstrap_worker(y, y_pred):
+    """
+    Store the true and predicted values once per worker process.
+    """
+    _bootstrap_data.update(y=y, y_pred=y_pred)
+
+def _bootstrap_metrics(task):
+    """
+    Compute R-squared and RMSE on n_samples resamples, in vectorized batches.
+    """
+    seed, n_samples = task
+    y, y_pred = _bootstrap_data['y'], _bootstrap_data['y_pred']
+    n = len(y)
+    rng = np.random.default_rng(seed)
+    batch_size = max(1, BOOTSTRAP_BATCH_VALUES // n)
+
+    r2, rmse = [], []
+    for start in range(0, n_samples, batch_size):
+        index = rng.integers(0, n, size=(min(batch_size, n_samples - start), n))
+        ys, errors = y[index], y_pred[index] - y[index]
+        sum_squared_errors = (errors ** 2).sum(axis=1)
+        r2.append(1 - sum_squared_errors / ((ys - ys.mean(axis=1, keepdims=True)) ** 2).sum(axis=1))
+        rmse.append(np.sqrt(sum_squared_errors / n))
+    return np.concatenate(r2), np.concatenate(rmse)
+
+def bootstrap_intervals(y, y_pred, n_samples=BOOTSTRAP_SAMPLES, confidence=CONFIDENCE, n_workers=None, seed=42):
+    """
+    Compute percentile bootstrap confidence intervals of R-squared and RMSE, spreading the resamples over processes.
+
+    Parameters:
+        y (pd.Series or np.ndarray): The true values.
+        y_pred (np.ndarray): The predicted values.
+        n_samples (int): The number of bootstrap resamples.
+        confidence (float): The confidence level of the intervals.
+        n_workers (int, optional): The number of worker processes. If None, all cores are used.
+        seed (int): The random seed.
+
+    Returns:
+        dict: The (low, high) interval of 'r2' and 'rmse'.
+    """
+    y, y_pred = np.asarray(y, dtype=float), np.asarray(y_pred, dtype=float)
+    # No more workers than resamples, so every worker gets a non-empty share
+    n_workers = min(n_workers or os.cpu_count(), n_samples)
+    seeds = np.random.SeedSequence(seed).spawn(n_workers)
+    counts = [len(part) for part in np.array_split(np.arange(n_samples), n_workers)]
+    tasks = [(task_seed, count) for task_seed, count in zip(seeds, counts) if count > 0]
+    with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_bootstrap_worker, initargs=(y, y_pred)) as executor:
+        results = list(executor.map(_bootstrap_metrics, tasks))
+
+    alpha = (1 - confidence) / 2
+    return {
+        name: tuple(np.quantile(np.concatenate([result[i] for result in results]), [alpha, 1 - alpha]))
+        for i, name in enumerate(['r2', 'rmse'])
+    }
+
+def evaluate(model, splits, n_bootstrap=BOOTSTRAP_SAMPLES, confidence=CONFIDENCE, n_workers=None):
+    """
+    Evaluate a model on several splits with global metrics, per-segment metrics and bootstrap intervals.
+
+    Each split goes through the model once, reading its transformed features from the design store
+    (see design_store.predict_split); every metric is computed from that single prediction pass.
+
+    Parameters:
+        model (object): The trained pipeline.
+        splits (dict): The (X, y) pair of each split, by name (e.g. 'train', 'validation', 'test').
+        n_bootstrap (int): The number of bootstrap resamples. If 0, no intervals are computed.
+        confidence (float): The confidence level of the intervals.
+        n_workers (int, optional): The number of bootstrap worker processes. If None, all cores are used.
+
+    Returns:
+        dict: The SplitEvaluation of each split, by name.
+    """
+    results = {}
+    for name, (X, y) in splits.items():
+        y_pred = predict_split(model, name, X, y)
+        results[name] = SplitEvaluation(
+            name=name,
+            n_rows=len(X),
+            metrics=compute_metrics(y, y_pred, X.shape[1]),
+            intervals=bootstrap_intervals(y, y_pred, n_bootstrap, confidence, n_workers) if n_bootstrap else {},
+            segments={
+                segment: segment_metrics(X, y, y_pred, columns)
+                for segment, columns in SEGMENTS.items()
+                if all(col in X.columns for col in columns)
+            },
+        )
+    return results
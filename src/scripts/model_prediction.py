@@ -1,33 +1,289 @@
+import multiprocessing
+import os
+import weakref
 import pandas as pd
 import numpy as np
-from src.utils.load_file import load
+from collections import deque
+from itertools import islice
+from pathlib import Path
+from src.scripts.compiled_transformer import CompiledPipeline, CompiledTransformer
+from src.scripts.forest_engine import ForestEngine
+from src.scripts.model_artifact import is_current, load_artifact
+from src.scripts.model_backends import model_file_name
+from src.utils.model_registry import get_model
+from src.utils.serving_metrics import drain, merge, observed_predict, record_error, reset
 
-MODEL_NAME = 'RandomForestRegressor.pkl'
+# The model file used when no other is given: the default backend's
+MODEL_NAME = model_file_name()
 
-def prediction(query):
+# Number of rows scored per model.predict call in batch mode
+CHUNK_SIZE = 10_000
+
+# Prediction engines: the sklearn pipeline, or the compiled transformer with the flattened forest
+ENGINES = ('sklearn', 'forest')
+
+# Flattened predictors built from each loaded model, dropped when the model is evicted or reloaded
+_forest_predictors = weakref.WeakKeyDictionary()
+
+def get_predictor(engine='sklearn', model_name=MODEL_NAME):
+    """
+    Get the pre-trained model wrapped in the requested prediction engine.
+
+    Parameters:
+        engine (str): 'sklearn' for the pickled pipeline, or 'forest' for the compiled transformer
+                      with the array-backed forest (RandomForestRegressor models only).
+        model_name (str): The model file in the 'models' directory (see model_backends.model_file_name).
+
+    Returns:
+        object: A predictor with a predict(X) method.
+    """
+    # Get the pre-trained model from the in-process cache (loaded from the pickle file on first use)
+    model = get_model(model_name)
+    if model is None:
+        raise FileNotFoundError(f"Model file '{model_name}' not found.")
+
+    if engine == 'sklearn':
+        return model
+    elif engine == 'forest':
+        if not hasattr(model[-1], 'estimators_'):
+            error = ValueError(f"The 'forest' engine only supports random forests, not '{model_name}'.")
+            record_error(error)
+            raise error
+        predictor = _forest_predictors.get(model)
+        if predictor is None:
+            predictor = CompiledPipeline(
+                CompiledTransformer.from_column_transformer(model[0]),
+                ForestEngine.from_random_forest(model[-1])
+            )
+            _forest_predictors[model] = predictor
+        return predictor
+    else:
+        error = ValueError(f"Unknown engine '{engine}'. Expected one of {ENGINES}.")
+        record_error(error)
+        raise error
+
+def prediction(query, engine='sklearn', model_name=MODEL_NAME):
     """
     Make a prediction using a pre-trained model.
 
     Parameters:
         query (pd.DataFrame or np.ndarray): The input data for prediction.
+        engine (str): The prediction engine ('sklearn' or 'forest').
+        model_name (str): The model file in the 'models' directory.
 
     Returns:
         float: The predicted value.
     """
     try:
-        # Load the pre-trained model from a pickle file
-        model = load(MODEL_NAME, 'pkl')
+        model = get_predictor(engine, model_name)
         
         # Ensure the input query is in the correct format for prediction
         if isinstance(query, pd.DataFrame) or isinstance(query, np.ndarray):
-            # Make a prediction using the loaded model
-            result = model.predict(query)[0]
+            # Make a prediction using the loaded model, recording its latency and errors
+            result = observed_predict(model, query)[0]
             return result
         else:
-            raise ValueError("Query must be a DataFrame or ndarray.")
+            error = ValueError("Query must be a DataFrame or ndarray.")
+            record_error(error)
+            raise error
     
-    except FileNotFoundError:
-        print(f"Model file '{MODEL_NAME}' not found.")
+    # Errors raised while predicting are already counted by observed_predict
+    except FileNotFoundError as e:
+        record_error(e)
+        print(f"Model file '{model_name}' not found.")
+    except ValueError as e:
+        print(f"Value error: {e}")
+    except Exception as e:
+        print(f"An unexpected error occurred: {e}")
+
+def _iter_chunks(source, chunk_size):
+    """
+    Split a prediction source into DataFrame chunks of at most chunk_size rows.
+
+    Parameters:
+        source (pd.DataFrame, str, Path or iterable): A DataFrame, a path to a CSV file, or an iterable of records (dicts).
+        chunk_size (int): The maximum number of rows per chunk.
+
+    Returns:
+        generator: The DataFrame chunks.
+    """
+    if isinstance(source, pd.DataFrame):
+        for start in range(0, len(source), chunk_size):
+            yield source.iloc[start:start + chunk_size]
+    elif isinstance(source, (str, Path)):
+        # Read the CSV file lazily so only one chunk is in memory at a time
+        yield from pd.read_csv(source, chunksize=chunk_size)
+    else:
+        records = iter(source)
+        while True:
+            batch = list(islice(records, chunk_size))
+            if not batch:
+                break
+            yield pd.DataFrame.from_records(batch)
+
+def iter_predictions(source, chunk_size=CHUNK_SIZE, engine='sklearn', model_name=MODEL_NAME):
+    """
+    Make predictions for many queries, one model.predict call per chunk.
+
+    Parameters:
+        source (pd.DataFrame, str, Path or iterable): A DataFrame, a path to a CSV file, or an iterable of records (dicts).
+        chunk_size (int): The maximum number of rows scored per model.predict call.
+        engine (str): The prediction engine ('sklearn' or 'forest').
+        model_name (str): The model file in the 'models' directory.
+
+    Returns:
+        generator: Tuples of (chunk, predictions) where predictions is an np.ndarray aligned with the chunk rows.
+    """
+    model = get_predictor(engine, model_name)
+
+    for chunk in _iter_chunks(source, chunk_size):
+        if len(chunk) == 0:
+            continue
+        yield chunk, observed_predict(model, chunk)
+
+def batch_prediction(source, output_file, chunk_size=CHUNK_SIZE, engine='sklearn', model_name=MODEL_NAME):
+    """
+    Make predictions for many queries and write them incrementally to a CSV file.
+
+    Parameters:
+        source (pd.DataFrame, str, Path or iterable): A DataFrame, a path to a CSV file, or an iterable of records (dicts).
+        output_file (str or Path): The path of the CSV file to write the queries and their 'predicted_price' to.
+        chunk_size (int): The maximum number of rows scored per model.predict call.
+        engine (str): The prediction engine ('sklearn' or 'forest').
+        model_name (str): The model file in the 'models' directory.
+
+    Returns:
+        int: The number of rows scored, or None if an error occurred.
+    """
+    try:
+        n_rows = 0
+        for chunk, predictions in iter_predictions(source, chunk_size, engine, model_name):
+            chunk.assign(predicted_price=predictions).to_csv(
+                output_file, mode='w' if n_rows == 0 else 'a', header=n_rows == 0, index=False
+            )
+            n_rows += len(chunk)
+
+        if n_rows == 0:
+            # Do not leave an earlier output in place that could be mistaken for this run's
+            Path(output_file).unlink(missing_ok=True)
+            print(f"No rows to score in the input. No predictions were saved to '{output_file}'.")
+            return 0
+
+        print(f"{n_rows} predictions saved to '{output_file}'.")
+        return n_rows
+
+    except FileNotFoundError as e:
+        print(e)
+    except ValueError as e:
+        print(f"Value error: {e}")
+    except Exception as e:
+        print(f"An unexpected error occurred: {e}")
+
+# Engines of parallel_batch_prediction: the in-process engines, or the memory-mapped model artifact
+SCORING_ENGINES = ENGINES + ('artifact',)
+
+# Predictor of a scoring worker process, set once by _init_scoring_worker
+_scoring_worker = {}
+
+def _load_scoring_predictor(engine, model_name):
+    if engine == 'artifact':
+        predictor = load_artifact(Path(model_name).stem)
+        if predictor is None:
+            raise FileNotFoundError(f"Model artifact '{Path(model_name).stem}.artifact' not found.")
+        return predictor
+    return get_predictor(engine, model_name)
+
+def _init_scoring_worker(engine, model_name):
+    """
+    Get the predictor once per worker process.
+
+    Forked workers find the model already loaded by the parent in the registry and share its pages
+    copy-on-write; artifact workers memory-map the same files, so the OS shares them through the page cache.
+    """
+    _scoring_worker['predictor'] = _load_scoring_predictor(engine, model_name)
+    # Forked workers inherit the parent's metrics; only their own are sent back
+    reset()
+
+def _score_chunk(chunk):
+    # The worker's metrics are sent back with each chunk and merged into the parent's
+    return observed_predict(_scoring_worker['predictor'], chunk), drain()
+
+def parallel_batch_prediction(source, output_file, chunk_size=CHUNK_SIZE, n_workers=None, engine='artifact',
+                              model_name=MODEL_NAME):
+    """
+    Score many queries across a pool of worker processes and write the predictions in input order.
+
+    The parent reads the source chunk by chunk and keeps at most two chunks per worker in flight,
+    so memory stays bounded whatever the source size.
+
+    Parameters:
+        source (pd.DataFrame, str, Path or iterable): A DataFrame, a path to a CSV file, or an iterable of records (dicts).
+        output_file (str or Path): The path of the CSV file to write the queries and their 'predicted_price' to.
+        chunk_size (int): The number of rows scored per task.
+        n_workers (int, optional): The number of worker processes. If None, all cores are used.
+        engine (str): The prediction engine ('sklearn', 'forest' or 'artifact').
+        model_name (str): The model file in the 'models' directory (the artifact is read next to it).
+
+    Returns:
+        int: The number of rows scored, or None if an error occurred.
+    """
+    try:
+        if engine not in SCORING_ENGINES:
+            error = ValueError(f"Unknown engine '{engine}'. Expected one of {SCORING_ENGINES}.")
+            record_error(error)
+            raise error
+        n_workers = n_workers or os.cpu_count()
+
+        # A stale artifact is never served: the pickled forest is compiled instead
+        if engine == 'artifact' and not is_current(Path(model_name).stem):
+            print(f"Warning: the artifact '{Path(model_name).stem}.artifact' does not match '{model_name}'. "
+                  "Using the pickled model with the 'forest' engine.")
+            engine = 'forest'
+
+        # Load the model before forking, so workers inherit it instead of each unpickling it
+        _load_scoring_predictor(engine, model_name)
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context('fork' if 'fork' in methods else None)
+
+        n_rows = 0
+        pending = deque()
+
+        def write_next():
+            nonlocal n_rows
+            chunk, result = pending.popleft()
+            try:
+                predictions, metrics = result.get()
+            except Exception as e:
+                # The worker's own count of the error is dropped with the pool
+                record_error(e)
+                raise
+            merge(metrics)
+            chunk.assign(predicted_price=predictions).to_csv(
+                output_file, mode='w' if n_rows == 0 else 'a', header=n_rows == 0, index=False
+            )
+            n_rows += len(chunk)
+
+        with context.Pool(n_workers, initializer=_init_scoring_worker, initargs=(engine, model_name)) as pool:
+            for chunk in _iter_chunks(source, chunk_size):
+                if len(chunk) == 0:
+                    continue
+                pending.append((chunk, pool.apply_async(_score_chunk, (chunk,))))
+                if len(pending) >= 2 * n_workers:
+                    write_next()
+            while pending:
+                write_next()
+
+        if n_rows == 0:
+            # Do not leave an earlier output in place that could be mistaken for this run's
+            Path(output_file).unlink(missing_ok=True)
+            print(f"No rows to score in the input. No predictions were saved to '{output_file}'.")
+            return 0
+
+        print(f"{n_rows} predictions saved to '{output_file}'.")
+        return n_rows
+
+    except FileNotFoundError as e:
+        print(e)
     except ValueError as e:
         print(f"Value error: {e}")
     except Exception as e:
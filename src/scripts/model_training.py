@@ -1,7 +1,20 @@
+import copy
+import json
+import pickle
+import time
 import pandas as pd
 import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from sklearn.base import clone
 from sklearn.ensemble import RandomForestRegressor
+from sklearn.model_selection import ParameterGrid
+from src.scripts.design_store import get_design
+from src.scripts.model_evaluation import compute_metrics
+from src.utils.load_file import load
 from src.utils.save_model import save
+from src.scripts.model_artifact import artifact_path, save_artifact
+from src.scripts.model_backends import BACKENDS
+from src.utils.profiling import instrument, is_enabled, stage, strip_instrumentation
 from sklearn.pipeline import Pipeline, FeatureUnion
 from sklearn.compose import ColumnTransformer
 from sklearn.preprocessing import OneHotEncoder, MinMaxScaler, FunctionTransformer, PowerTransformer
@@ -25,17 +38,19 @@ location_transformer = Pipeline(steps=[
     ('power_transformer', PowerTransformer())
 ])
 
+# Cities considered to be in the north
+NORTH_CITIES = {"Delhi", "Kolkata", "Mumbai", "New Delhi"}
+
 # Define a custom function to determine if a location is in the north
 def is_north(X):
     """
     Determine if a location is in the north.
     """
     columns = X.columns.to_list()
-    north_cities = {"Delhi", "Kolkata", "Mumbai", "New Delhi"}
     return (
         X
         .assign(**{
-            f"{col}_is_north": X.loc[:, col].isin(north_cities).astype(int)
+            f"{col}_is_north": X.loc[:, col].isin(NORTH_CITIES).astype(int)
             for col in columns
         })
         .drop(columns=columns)
@@ -118,32 +133,437 @@ column_transformer = ColumnTransformer(transformers=[
     ('total_stops_transformer', total_stops_transformer, ['total_stops'])
 ])
 
+def make_pipeline(backend='random_forest'):
+    """
+    Create an unfitted pipeline of the column_transformer followed by a backend's estimator.
+
+    Parameters:
+        backend (str): The name of the backend in BACKENDS.
+
+    Returns:
+        Pipeline: The unfitted pipeline.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend '{backend}'. Expected one of {list(BACKENDS)}.")
+    return Pipeline(steps=[
+        ('preprocessor', clone(column_transformer)),
+        (BACKENDS[backend]['step'], BACKENDS[backend]['estimator']())
+    ])
+
 # Create the full pipeline including the RandomForestRegressor
 pipeline = Pipeline(steps=[
     ('preprocessor', column_transformer),
-    ('RF', RandomForestRegressor(max_depth=20, max_features=0.5, n_estimators=150))
+    ('RF', BACKENDS['random_forest']['estimator']())
 ])
 
-def rf_train(X_train, y_train):
+def rf_train(X_train, y_train, backend='random_forest'):
     """
-    Train a RandomForestRegressor model using the provided training data and save the trained model.
+    Train a model of the given backend using the provided training data and save the trained model.
 
     Parameters:
         X_train (pd.DataFrame): The training features.
         y_train (pd.Series): The target variable.
+        backend (str): The name of the backend in BACKENDS.
 
     Returns:
         None
     """
     try:
-        # Fit the pipeline to the training data
-        pipeline.fit(X_train, y_train)
+        model = pipeline if backend == 'random_forest' else make_pipeline(backend)
+
+        if is_enabled():
+            # Fit the steps separately, recording each named transformer of the column transformer
+            model.set_params(preprocessor=instrument(column_transformer))
+            with stage('rf_train.preprocessor.fit_transform', rows=len(X_train)):
+                X_design = model[0].fit_transform(X_train, y_train)
+            strip_instrumentation(model[0])
+            with stage(f'rf_train.{backend}.fit', rows=len(X_train)):
+                model[-1].fit(X_design, y_train)
+        else:
+            # Fit the pipeline to the training data
+            model.fit(X_train, y_train)
         
-        # Save the trained model
-        save(pipeline, 'RandomForestRegressor')
+        # Save the trained model, and the memory-mappable artifact of random forests next to it
+        model_name = BACKENDS[backend]['model_name']
+        save(model, model_name)
+        if isinstance(model[-1], RandomForestRegressor):
+            save_artifact(model, model_name)
         print("Model trained and saved successfully.")
     
     except ValueError as e:
         print(f"Value error during training: {e}")
     except Exception as e:
         print(f"An unexpected error occurred during training: {e}")
+
+def compare_backends(X_train, y_train, X_val, y_val, backends=None):
+    """
+    Fit each backend on the training split and compare fit time, prediction latency, model size and validation metrics.
+
+    The models are not saved.
+
+    Parameters:
+        X_train (pd.DataFrame): The training features.
+        y_train (pd.Series): The training target variable.
+        X_val (pd.DataFrame): The validation features.
+        y_val (pd.Series): The validation target variable.
+        backends (list, optional): The names of the backends to compare. If None, all of BACKENDS are compared.
+
+    Returns:
+        list: One dict per backend with its timings, pickled size and validation metrics, or None if an error occurred.
+    """
+    try:
+        results = []
+        for backend in backends or BACKENDS:
+            model = make_pipeline(backend)
+            start = time.perf_counter()
+            model.fit(X_train, y_train)
+            fit_seconds = time.perf_counter() - start
+
+            single_row = X_val.head(1)
+            model.predict(single_row)
+            start = time.perf_counter()
+            for _ in range(20):
+                model.predict(single_row)
+            single_row_ms = (time.perf_counter() - start) / 20 * 1e3
+
+            results.append({
+                'backend': backend,
+                'fit_seconds': fit_seconds,
+                'batch_us_per_row': _seconds_per_row(model, X_val) * 1e6,
+                'single_row_ms': single_row_ms,
+                'model_size_mb': len(pickle.dumps(model)) / 1e6,
+                **compute_metrics(y_val, model.predict(X_val), X_val.shape[1]),
+            })
+
+        for result in results:
+            print(f"{result['backend']}: fit {result['fit_seconds']:.2f}s, predict {result['batch_us_per_row']:.2f} us/row "
+                  f"(single row {result['single_row_ms']:.2f} ms), size {result['model_size_mb']:.1f} MB, "
+                  f"validation RMSE: {result['rmse']:.4f} R^2: {result['r2']:.4f}")
+        return results
+
+    except ValueError as e:
+        print(f"Value error during the comparison: {e}")
+    except Exception as e:
+        print(f"An unexpected error occurred during the comparison: {e}")
+
+# Default RandomForestRegressor search space for rf_tune
+PARAM_GRID = {
+    'max_depth': [10, 20, None],
+    'max_features': [0.3, 0.5, 0.7],
+    'n_estimators': [100, 150, 200]
+}
+
+# Transformed training/validation data shared by the tuning workers
+_tuning_data = {}
+
+def _init_tuning_worker(X_train, y_train, X_val, y_val):
+    """
+    Store the transformed training and validation data once per worker process.
+    """
+    _tuning_data.update(X_train=X_train, y_train=y_train, X_val=X_val, y_val=y_val)
+
+def _score_candidate(params):
+    """
+    Fit one RandomForestRegressor candidate on the transformed data and score it on the validation split.
+    """
+    start = time.perf_counter()
+    model = RandomForestRegressor(random_state=42, n_jobs=1, **params)
+    model.fit(_tuning_data['X_train'], _tuning_data['y_train'])
+    metrics = compute_metrics(_tuning_data['y_val'], model.predict(_tuning_data['X_val']), _tuning_data['X_val'].shape[1])
+    return {'params': params, **metrics, 'seconds': time.perf_counter() - start}
+
+def rf_tune(X_train, y_train, X_val, y_val, param_grid=PARAM_GRID, n_workers=None):
+    """
+    Search RandomForestRegressor hyperparameters in parallel, select on the validation split and save the best model.
+
+    The column_transformer is fitted once and the transformed splits are read from the design store,
+    so they are only recomputed when the preprocessor or the data changed; every candidate reuses them.
+
+    Parameters:
+        X_train (pd.DataFrame): The training features.
+        y_train (pd.Series): The training target variable.
+        X_val (pd.DataFrame): The validation features.
+        y_val (pd.Series): The validation target variable.
+        param_grid (dict): The RandomForestRegressor parameters to search.
+        n_workers (int, optional): The number of worker processes. If None, all cores are used.
+
+    Returns:
+        list: One dict per candidate with its parameters, validation metrics and wall time, best first.
+    """
+    try:
+        # Fit the preprocessing once and share the stored design matrices with all candidates
+        preprocessor = clone(column_transformer).fit(X_train, y_train)
+        design = (
+            get_design('train', preprocessor, X_train, y_train)[0], np.asarray(y_train),
+            get_design('validation', preprocessor, X_val, y_val)[0], np.asarray(y_val)
+        )
+
+        start = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_tuning_worker, initargs=design) as executor:
+            results = list(executor.map(_score_candidate, ParameterGrid(param_grid)))
+        total_seconds = time.perf_counter() - start
+
+        results.sort(key=lambda result: result['rmse'])
+        for result in results:
+            print(f"{result['params']} validation RMSE: {result['rmse']:.4f} R^2: {result['r2']:.4f} ({result['seconds']:.2f}s)")
+        print(f"Searched {len(results)} candidates in {total_seconds:.2f}s.")
+
+        # Refit the best candidate on all cores and save it with the fitted preprocessor
+        best = RandomForestRegressor(random_state=42, n_jobs=-1, **results[0]['params'])
+        best.fit(design[0], design[1])
+        best.set_params(n_jobs=None)
+        tuned_pipeline = Pipeline(steps=[('preprocessor', preprocessor), ('RF', best)])
+
+        save(tuned_pipeline, 'RandomForestRegressor')
+        save_artifact(tuned_pipeline, 'RandomForestRegressor')
+        print(f"Best parameters: {results[0]['params']}")
+        return results
+
+    except ValueError as e:
+        print(f"Value error during tuning: {e}")
+    except Exception as e:
+        print(f"An unexpected error occurred during tuning: {e}")
+
+def rf_update(X_new, y_new, X_val, y_val, X_test, y_test, n_new_trees=50, max_trees=None, tolerance=0.01):
+    """
+    Extend the saved RandomForestRegressor with trees fitted on new data only, and save it if it is not worse.
+
+    The fitted preprocessor is kept as is: the validation and test splits are read from the design store
+    and only the new rows are transformed. The new trees are added
+    with warm_start; when max_trees is set, the oldest trees are retired to keep the forest at that size.
+    The updated model is saved only if its validation RMSE is at most (1 + tolerance) times the current one.
+
+    Parameters:
+        X_new (pd.DataFrame): The new cleaned features, with times converted as for training.
+        y_new (pd.Series): The new target variable.
+        X_val (pd.DataFrame): The validation features.
+        y_val (pd.Series): The validation target variable.
+        X_test (pd.DataFrame): The test features.
+        y_test (pd.Series): The test target variable.
+        n_new_trees (int): The number of trees fitted on the new data.
+        max_trees (int, optional): The maximum number of trees kept. If None, the forest grows.
+        tolerance (float): The relative validation RMSE increase accepted.
+
+    Returns:
+        dict: The 'current' and 'updated' validation and test metrics, and whether the updated model was 'saved'.
+    """
+    try:
+        model = load('RandomForestRegressor.pkl', 'pkl')
+        if model is None:
+            raise FileNotFoundError("No trained model to update. Run rf_train first.")
+        preprocessor, forest = model[0], model[-1]
+
+        # Score the current model before its forest is modified in place
+        X_val_design = get_design('validation', preprocessor, X_val, y_val)[0]
+        X_test_design = get_design('test', preprocessor, X_test, y_test)[0]
+        current = {
+            'validation': compute_metrics(y_val, forest.predict(X_val_design), X_val.shape[1]),
+            'test': compute_metrics(y_test, forest.predict(X_test_design), X_test.shape[1]),
+        }
+
+        # Fit the additional trees on the new rows only
+        forest.set_params(warm_start=True, n_estimators=len(forest.estimators_) + n_new_trees)
+        forest.fit(preprocessor.transform(X_new), y_new)
+        forest.set_params(warm_start=False)
+
+        # Retire the oldest trees
+        if max_trees is not None and len(forest.estimators_) > max_trees:
+            forest.estimators_ = forest.estimators_[-max_trees:]
+            forest.set_params(n_estimators=max_trees)
+
+        updated = {
+            'validation': compute_metrics(y_val, forest.predict(X_val_design), X_val.shape[1]),
+            'test': compute_metrics(y_test, forest.predict(X_test_design), X_test.shape[1]),
+        }
+        for name, metrics in (('current', current), ('updated', updated)):
+            print(f"{name} validation RMSE: {metrics['validation']['rmse']:.4f} test RMSE: {metrics['test']['rmse']:.4f}")
+
+        saved = updated['validation']['rmse'] <= current['validation']['rmse'] * (1 + tolerance)
+        if saved:
+            save(model, 'RandomForestRegressor')
+            save_artifact(model, 'RandomForestRegressor')
+            print(f"Model updated with {len(X_new)} new rows and saved successfully ({len(forest.estimators_)} trees).")
+        else:
+            print("Updated model is worse on the validation split. The saved model was kept.")
+        return {'current': current, 'updated': updated, 'saved': saved}
+
+    except FileNotFoundError as e:
+        print(e)
+    except ValueError as e:
+        print(f"Value error during update: {e}")
+    except Exception as e:
+        print(f"An unexpected error occurred during update: {e}")
+
+# Candidate tree counts and depth caps searched by rf_prune
+PRUNE_TREE_COUNTS = [10, 25, 50, 100, 150]
+PRUNE_DEPTHS = [8, 10, 12, 16, None]
+
+# Timed predict calls per rf_prune candidate
+PRUNE_REPEATS = 30
+
+def cap_depth(tree, max_depth):
+    """
+    Turn the nodes of a fitted decision tree at depth max_depth into leaves, in place.
+
+    Every node of a fitted regression tree stores the mean target of its samples, so a cut node
+    predicts what its subtree would have averaged to. Nodes below the cut become unreachable.
+
+    Parameters:
+        tree (DecisionTreeRegressor): The fitted tree.
+        max_depth (int): The maximum depth kept.
+
+    Returns:
+        DecisionTreeRegressor: The same tree.
+    """
+    state = tree.tree_.__getstate__()
+    nodes = state['nodes'].copy()
+
+    # Walk down level by level to the nodes at depth max_depth
+    frontier = np.array([0])
+    for _ in range(max_depth):
+        internal = frontier[nodes['left_child'][frontier] != -1]
+        frontier = np.concatenate([nodes['left_child'][internal], nodes['right_child'][internal]])
+
+    nodes['left_child'][frontier] = -1
+    nodes['right_child'][frontier] = -1
+    nodes['feature'][frontier] = -2
+    nodes['threshold'][frontier] = -2.0
+    state['nodes'] = nodes
+    state['max_depth'] = min(state['max_depth'], max_depth)
+    tree.tree_.__setstate__(state)
+    return tree
+
+def prune_forest(forest, n_trees, max_depth=None):
+    """
+    Get a copy of a fitted RandomForestRegressor keeping its first n_trees trees, optionally capped at max_depth.
+
+    Parameters:
+        forest (RandomForestRegressor): The fitted forest.
+        n_trees (int): The number of trees kept.
+        max_depth (int, optional): The maximum depth of the kept trees. If None, the trees are not cut.
+
+    Returns:
+        RandomForestRegressor: The pruned forest.
+    """
+    pruned = copy.copy(forest)
+    pruned.estimators_ = [copy.deepcopy(tree) for tree in forest.estimators_[:n_trees]]
+    pruned.n_estimators = len(pruned.estimators_)
+    if max_depth is not None:
+        for tree in pruned.estimators_:
+            cap_depth(tree, max_depth)
+    return pruned
+
+def _seconds_per_row(model, X, repeats=3):
+    """
+    Get the best of repeats timings of model.predict(X), per row.
+    """
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        model.predict(X)
+        timings.append(time.perf_counter() - start)
+    return min(timings) / len(X)
+
+def _forest_latency(forest, design, repeats=PRUNE_REPEATS):
+    """
+    Time repeats calls of forest.predict on a transformed design matrix.
+
+    Returns the median and 99th percentile time per row in microseconds, and the predictions.
+    """
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        predictions = forest.predict(design)
+        timings.append(time.perf_counter() - start)
+    median, p99 = np.percentile(timings, [50, 99]) / len(design) * 1e6
+    return median, p99, predictions
+
+def _enforce_monotone_latency(curve):
+    """
+    Check that latency grows with the tree count at each depth cap, raising noisy timings that do not.
+
+    A forest cannot be faster than its own subset, so a larger candidate timed faster than a smaller
+    one gets the smaller one's latency.
+    """
+    for max_depth in {point['max_depth'] for point in curve}:
+        slowest = None
+        for point in sorted((point for point in curve if point['max_depth'] == max_depth), key=lambda point: point['n_trees']):
+            if slowest is not None and point['us_per_row'] < slowest['us_per_row']:
+                print(f"Timing of {point['n_trees']} trees, max depth {max_depth} ({point['us_per_row']:.2f} us/row) "
+                      f"is below that of {slowest['n_trees']} trees; using {slowest['us_per_row']:.2f} us/row.")
+                point['us_per_row'] = slowest['us_per_row']
+                point['p99_us_per_row'] = max(point['p99_us_per_row'], slowest['p99_us_per_row'])
+            slowest = point
+
+def rf_prune(X_val, y_val, target_us_per_row, tree_counts=PRUNE_TREE_COUNTS, depths=PRUNE_DEPTHS,
+             model_name='RandomForestRegressor_pruned'):
+    """
+    Select the most accurate subset of trees and depth cap of the saved forest meeting a per-row latency target.
+
+    The validation split is read from the design store, then every combination of tree count and depth cap is
+    timed on the design matrix (forest.predict only, median and 99th percentile of PRUNE_REPEATS calls)
+    and scored with compute_metrics. Timings are checked to grow with the tree count before a candidate
+    is selected. The selected model is saved as a separate pickle and artifact, and the whole
+    latency-vs-accuracy curve is saved next to them as JSON.
+
+    Parameters:
+        X_val (pd.DataFrame): The validation features.
+        y_val (pd.Series): The validation target variable.
+        target_us_per_row (float): The target median batch inference time per row of the forest, in microseconds.
+        tree_counts (list): The numbers of trees to try.
+        depths (list): The depth caps to try (None for uncut trees).
+        model_name (str): The name of the pruned model to save (without extension).
+
+    Returns:
+        list: One dict per candidate with its tree count, depth cap, latency and validation metrics, fastest first.
+    """
+    try:
+        model = load('RandomForestRegressor.pkl', 'pkl')
+        if model is None:
+            raise FileNotFoundError("No trained model to prune. Run rf_train first.")
+        preprocessor, forest = model[0], model[-1]
+        # The stored matrix is float32, as forests predict on; it is read into memory so page faults are not timed
+        design = np.array(get_design('validation', preprocessor, X_val, y_val)[0])
+
+        curve = []
+        for n_trees in sorted({min(count, len(forest.estimators_)) for count in tree_counts}):
+            for max_depth in depths:
+                us_per_row, p99_us_per_row, y_pred = _forest_latency(prune_forest(forest, n_trees, max_depth), design)
+                curve.append({
+                    'n_trees': n_trees,
+                    'max_depth': max_depth,
+                    'us_per_row': us_per_row,
+                    'p99_us_per_row': p99_us_per_row,
+                    **compute_metrics(y_val, y_pred, X_val.shape[1]),
+                })
+
+        _enforce_monotone_latency(curve)
+        curve.sort(key=lambda point: point['us_per_row'])
+        full = next((point for point in curve if point['n_trees'] == len(forest.estimators_) and point['max_depth'] is None), None)
+        for point in curve:
+            print(f"{point['n_trees']:>4} trees, max depth {str(point['max_depth']):>4}: {point['us_per_row']:8.2f} us/row "
+                  f"(p99 {point['p99_us_per_row']:8.2f}), "
+                  f"validation RMSE: {point['rmse']:.4f} R^2: {point['r2']:.4f}")
+
+        # The most accurate candidate within the budget, or the fastest one if none is
+        within_budget = [point for point in curve if point['us_per_row'] <= target_us_per_row]
+        best = min(within_budget, key=lambda point: point['rmse']) if within_budget else curve[0]
+        if not within_budget:
+            print(f"No candidate meets {target_us_per_row} us/row. Saving the fastest one.")
+        if full is not None:
+            print(f"Selected {best['n_trees']} trees, max depth {best['max_depth']}: "
+                  f"RMSE {best['rmse'] - full['rmse']:+.4f}, R^2 {best['r2'] - full['r2']:+.4f} vs the full forest.")
+
+        pruned = Pipeline(steps=[('preprocessor', preprocessor), ('RF', prune_forest(forest, best['n_trees'], best['max_depth']))])
+        save(pruned, model_name)
+        save_artifact(pruned, model_name)
+        with open(artifact_path(model_name).with_suffix('.curve.json'), 'w') as file:
+            json.dump({'target_us_per_row': target_us_per_row, 'selected': best, 'curve': curve}, file, indent=2)
+        return curve
+
+    except FileNotFoundError as e:
+        print(e)
+    except ValueError as e:
+        print(f"Value error during pruning: {e}")
+    except Exception as e:
+        print(f"An unexpected error occurred during pruning: {e}")
@@ -0,0 +1,203 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+import numpy as np
+import pandas as pd
+from src.scripts.model_prediction import MODEL_NAME, get_predictor
+from src.utils.model_registry import model_signature
+from src.utils.serving_metrics import observed_predict
+
+# The model input columns, in canonical order
+QUERY_COLUMNS = [
+    'airline', 'date_of_journey', 'source', 'destination',
+    'dep_time', 'arrival_time', 'duration_minute', 'total_stops'
+]
+
+# Maximum number of cached predictions and their time to live
+MAX_ENTRIES = 100_000
+TTL_SECONDS = 3600
+
+# Decimals the duration (in minutes) is rounded to in a cache key; finer differences share a prediction
+DURATION_DECIMALS = 6
+
+# (model file, *canonical query) -> (expiry time, prediction), ordered from least to most recently used
+_predictions = OrderedDict()
+# Model file -> the signature of the file when its predictions were cached
+_model_versions = {}
+_stats = {'hits': 0, 'misses': 0, 'expired': 0, 'evictions': 0, 'invalidations': 0}
+_lock = Lock()
+
+def _canonical_date(value):
+    """
+    Normalize a date (ISO string, datetime or Timestamp) to 'YYYY-MM-DD'.
+    """
+    if hasattr(value, 'strftime'):
+        return value.strftime('%Y-%m-%d')
+    value = str(value).strip()
+    if len(value) >= 10 and value[4] == '-' and value[7] == '-':
+        return value[:10]
+    return pd.to_datetime(value, format='mixed', yearfirst=True).strftime('%Y-%m-%d')
+
+def _canonical_time(value):
+    """
+    Normalize a time ('HH:MM[:SS]' string, time, datetime or Timestamp) to 'HH:MM'.
+    """
+    if hasattr(value, 'hour'):
+        return f'{value.hour:02d}:{value.minute:02d}'
+    value = str(value).strip()
+    if len(value) >= 5 and value[2] == ':':
+        return value[:5]
+    return pd.to_datetime(value, format='mixed').strftime('%H:%M')
+
+def _canonical_stops(value):
+    """
+    Normalize a number of stops to int, rejecting non-integral values instead of truncating them.
+    """
+    stops = float(value)
+    if not stops.is_integer():
+        raise ValueError(f"total_stops must be a whole number, got {value!r}.")
+    return int(stops)
+
+def canonicalize(query):
+    """
+    Build a canonical, hashable key for each query row.
+
+    Strings are stripped, dates are normalized to 'YYYY-MM-DD', times to 'HH:MM' (the model only uses
+    the hour and minute), the duration to a float rounded to DURATION_DECIMALS and the stops to int,
+    so equivalent queries in different formats share a key. Non-integral stops raise a ValueError.
+
+    Parameters:
+        query (pd.DataFrame): The queries, with the 8 model input columns in any order.
+
+    Returns:
+        list: One tuple per row, with the values in QUERY_COLUMNS order.
+    """
+    return [
+        (
+            str(airline).strip(), _canonical_date(date), str(source).strip(), str(destination).strip(),
+            _canonical_time(dep_time), _canonical_time(arrival_time), round(float(duration), DURATION_DECIMALS), _canonical_stops(stops)
+        )
+        for airline, date, source, destination, dep_time, arrival_time, duration, stops
+        in zip(*(query[col].tolist() for col in QUERY_COLUMNS))
+    ]
+
+def _check_model_version(model_name):
+    """
+    Drop a model's cached predictions when its file has changed.
+    """
+    version = model_signature(model_name)
+    if version != _model_versions.get(model_name):
+        stale = [key for key in _predictions if key[0] == model_name]
+        if stale:
+            _stats['invalidations'] += 1
+        for key in stale:
+            del _predictions[key]
+        _model_versions[model_name] = version
+
+def predict_cached(query, engine='sklearn', model_name=MODEL_NAME):
+    """
+    Make predictions for all query rows, serving repeated itineraries from the cache.
+
+    Rows that are not cached are predicted together in one model.predict call, on their canonical
+    values, so the prediction cached under a key is the prediction of that key.
+
+    Parameters:
+        query (pd.DataFrame): The queries, with the 8 model input columns.
+        engine (str): The prediction engine used on cache misses ('sklearn' or 'forest').
+        model_name (str): The model file in the 'models' directory; each model has its own cached predictions.
+
+    Returns:
+        np.ndarray: The predicted values, one per row.
+    """
+    keys = [(model_name,) + key for key in canonicalize(query)]
+    results = np.empty(len(keys), dtype=np.float64)
+    missing = []
+    now = time.monotonic()
+
+    with _lock:
+        _check_model_version(model_name)
+        for i, key in enumerate(keys):
+            cached = _predictions.get(key)
+            if cached is not None and cached[0] > now:
+                _predictions.move_to_end(key)
+                results[i] = cached[1]
+                _stats['hits'] += 1
+            else:
+                if cached is not None:
+                    _stats['expired'] += 1
+                missing.append(i)
+                _stats['misses'] += 1
+
+    if missing:
+        canonical = pd.DataFrame([keys[i][1:] for i in missing], columns=QUERY_COLUMNS)
+        predictions = observed_predict(get_predictor(engine, model_name), canonical)
+        results[missing] = predictions
+
+        with _lock:
+            expires_at = time.monotonic() + TTL_SECONDS
+            for i, value in zip(missing, predictions):
+                _predictions[keys[i]] = (expires_at, float(value))
+                _predictions.move_to_end(keys[i])
+
+            # Evict the least recently used predictions
+            while len(_predictions) > MAX_ENTRIES:
+                _predictions.popitem(last=False)
+                _stats['evictions'] += 1
+
+    return results
+
+def cached_prediction(query, engine='sklearn', model_name=MODEL_NAME):
+    """
+    Make a prediction using a pre-trained model, served from the cache for repeated itineraries.
+
+    Parameters:
+        query (pd.DataFrame): The input data for prediction.
+        engine (str): The prediction engine used on cache misses ('sklearn' or 'forest').
+        model_name (str): The model file in the 'models' directory.
+
+    Returns:
+        float: The predicted value.
+    """
+    try:
+        if not isinstance(query, pd.DataFrame):
+            raise ValueError("Query must be a DataFrame.")
+        return predict_cached(query, engine, model_name)[0]
+
+    except FileNotFoundError:
+        print(f"Model file '{model_name}' not found.")
+    except ValueError as e:
+        print(f"Value error: {e}")
+    except Exception as e:
+        print(f"An unexpected error occurred: {e}")
+
+def cache_stats():
+    """
+    Get the hit/miss counters of the prediction cache.
+
+    Parameters:
+        None
+
+    Returns:
+        dict: The cache counters, the hit rate and the number of cached predictions.
+    """
+    with _lock:
+        stats = dict(_stats)
+        stats['size'] = len(_predictions)
+    lookups = stats['hits'] + stats['misses']
+    stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+    return stats
+
+def clear_cache():
+    """
+    Remove all cached predictions and reset the counters.
+
+    Parameters:
+        None
+
+    Returns:
+        None
+    """
+    with _lock:
+        _predictions.clear()
+        for key in _stats:
+            _stats[key] = 0
@@ -0,0 +1,156 @@
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from src.scripts.data_cleaning import duration_to_minutes
+
+# Columns that identify an itinerary group; every other column is sampled conditionally on the group
+GROUP_COLUMNS = ['Airline', 'Source', 'Destination', 'Route', 'Total_Stops']
+
+# Number of rows generated and written per chunk
+CHUNK_SIZE = 100_000
+
+# Random perturbations applied to sampled values, so generated rows are not copies of observed ones
+TIME_JITTER_STEPS = 2  # departure times move by up to +/- 2 x 5 minutes
+DURATION_JITTER_STEPS = 2  # durations move by up to +/- 2 x 5 minutes
+PRICE_NOISE = 0.05  # prices are multiplied by a lognormal factor with this sigma
+
+def _conditional(group_codes, values):
+    """
+    Group values by itinerary group, so a value can be drawn for each sampled group in one vectorized step.
+    """
+    order = np.argsort(group_codes, kind='stable')
+    counts = np.bincount(group_codes, minlength=group_codes.max() + 1)
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    return {'starts': starts, 'counts': counts, 'values': np.asarray(values)[order]}
+
+def _draw(conditional, groups, rng):
+    index = conditional['starts'][groups] + (rng.random(len(groups)) * conditional['counts'][groups]).astype(np.int64)
+    return conditional['values'][index]
+
+def fit_generator(raw):
+    """
+    Learn the distributions of the raw flight price columns.
+
+    Itinerary groups (airline, source, destination, route, stops) follow their joint empirical
+    distribution. The journey date, departure time, duration, additional info and price are drawn
+    from their empirical distribution within the group.
+
+    Parameters:
+        raw (pd.DataFrame): The raw data, with the columns of data/flight_price.csv.
+
+    Returns:
+        dict: The fitted generator, used by generate.
+    """
+    # Learn only from rows that clean_df keeps
+    raw = raw[~raw['Duration'].isin(['5m'])].dropna().reset_index(drop=True)
+    # Groups are numbered in order of first appearance, matching drop_duplicates
+    group_codes = raw.groupby(GROUP_COLUMNS, sort=False).ngroup().to_numpy()
+    groups = raw[GROUP_COLUMNS].drop_duplicates().reset_index(drop=True)
+    group_counts = np.bincount(group_codes)
+
+    dep_minutes = (
+        raw['Dep_Time'].str[:2].astype(int) * 60 + raw['Dep_Time'].str[3:5].astype(int)
+    ).to_numpy()
+
+    return {
+        'groups': groups,
+        'group_probabilities': group_counts / group_counts.sum(),
+        'date_of_journey': _conditional(group_codes, raw['Date_of_Journey'].to_numpy()),
+        'dep_minute': _conditional(group_codes, dep_minutes),
+        'duration_minute': _conditional(group_codes, duration_to_minutes(raw['Duration']).to_numpy()),
+        'additional_info': _conditional(group_codes, raw['Additional_Info'].to_numpy()),
+        'price': _conditional(group_codes, raw['Price'].to_numpy()),
+    }
+
+def _format_clock(minutes):
+    minutes = pd.Series(minutes)
+    return (minutes // 60).astype(str).str.zfill(2) + ':' + (minutes % 60).astype(str).str.zfill(2)
+
+def sample(generator, n_rows, rng):
+    """
+    Draw raw rows from a fitted generator.
+
+    Parameters:
+        generator (dict): The generator returned by fit_generator.
+        n_rows (int): The number of rows to draw.
+        rng (np.random.Generator): The random number generator.
+
+    Returns:
+        pd.DataFrame: The rows, in the raw format of data/flight_price.csv.
+    """
+    groups = rng.choice(len(generator['group_probabilities']), size=n_rows, p=generator['group_probabilities'])
+    rows = generator['groups'].iloc[groups].reset_index(drop=True)
+
+    dates = pd.Series(_draw(generator['date_of_journey'], groups, rng))
+    dep_minute = (
+        _draw(generator['dep_minute'], groups, rng)
+        + 5 * rng.integers(-TIME_JITTER_STEPS, TIME_JITTER_STEPS + 1, size=n_rows)
+    ) % 1440
+    duration = np.maximum(
+        _draw(generator['duration_minute'], groups, rng)
+        + 5 * rng.integers(-DURATION_JITTER_STEPS, DURATION_JITTER_STEPS + 1, size=n_rows),
+        30
+    )
+    price = np.round(_draw(generator['price'], groups, rng) * rng.lognormal(0, PRICE_NOISE, size=n_rows)).astype(int)
+
+    # Arrival time as 'HH:MM', with the arrival day ('HH:MM DD Mon') when the flight lands on a later day
+    arrival_total = dep_minute + duration
+    days_later = arrival_total // 1440
+    journey_dates = pd.to_datetime(dates, dayfirst=True)
+    arrival_dates = (journey_dates + pd.to_timedelta(days_later, unit='D')).dt.strftime(' %d %b')
+    arrival_time = _format_clock(arrival_total % 1440) + arrival_dates.where(days_later > 0, '')
+
+    # Duration as '2h 50m', or '19h' when there are no extra minutes
+    duration = pd.Series(duration)
+    duration_text = (duration // 60).astype(str) + 'h'
+    duration_text = duration_text.where(duration % 60 == 0, duration_text + ' ' + (duration % 60).astype(str) + 'm')
+
+    return pd.DataFrame({
+        'Airline': rows['Airline'],
+        'Date_of_Journey': dates,
+        'Source': rows['Source'],
+        'Destination': rows['Destination'],
+        'Route': rows['Route'],
+        'Dep_Time': _format_clock(dep_minute),
+        'Arrival_Time': arrival_time,
+        'Duration': duration_text,
+        'Total_Stops': rows['Total_Stops'],
+        'Additional_Info': _draw(generator['additional_info'], groups, rng),
+        'Price': price,
+    })
+
+def generate(generator, n_rows, output_file_name, chunk_size=CHUNK_SIZE, seed=42):
+    """
+    Stream synthetic raw rows to a CSV file in the 'data' directory, one chunk at a time.
+
+    Parameters:
+        generator (dict): The generator returned by fit_generator.
+        n_rows (int): The number of rows to generate.
+        output_file_name (str): The name of the CSV file to write in the 'data' directory.
+        chunk_size (int): The number of rows generated and written per chunk.
+        seed (int): The random seed.
+
+    Returns:
+        int: The number of rows written, or None if an error occurred.
+    """
+    try:
+        # Get the path to the current script
+        current_dir = Path(__file__).resolve().parent
+
+        # Navigate to the project root directory
+        project_root = current_dir.parent.parent
+
+        output_path = project_root / 'data' / output_file_name
+        rng = np.random.default_rng(seed)
+
+        for start in range(0, n_rows, chunk_size):
+            chunk = sample(generator, min(chunk_size, n_rows - start), rng)
+            chunk.to_csv(output_path, mode='w' if start == 0 else 'a', header=start == 0, index=False)
+
+        print(f"File '{output_file_name}' saved successfully ({n_rows} rows).")
+        return n_rows
+
+    except FileNotFoundError:
+        print(f"Directory not found. Failed to save the file '{output_file_name}'.")
+    except Exception as e:
+        print(f"An error occurred while generating synthetic data: {e}")
@@ -0,0 +1,92 @@
+import json
+import pickle
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+# Version of the on-disk layout written by write_columnar
+FORMAT_VERSION = 1
+
+def write_columnar(path, df):
+    """
+    Write a DataFrame as a directory of one .npy file per column plus a 'meta.json' schema.
+
+    Numeric, boolean and datetime64 columns are stored as raw arrays. Categorical columns keep their
+    codes and categories, and object columns (strings, datetime.time) are dictionary-encoded.
+
+    Parameters:
+        path (str or Path): The directory to write.
+        df (pd.DataFrame): The DataFrame to write.
+
+    Returns:
+        None
+    """
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+
+    columns = []
+    for i, (name, ser) in enumerate(df.items()):
+        if isinstance(ser.dtype, pd.CategoricalDtype):
+            np.save(path / f'{i}.npy', ser.cat.codes.to_numpy())
+            with open(path / f'{i}.pkl', 'wb') as file:
+                pickle.dump(ser.cat.categories, file)
+            columns.append({'name': name, 'kind': 'category', 'ordered': bool(ser.cat.ordered)})
+
+        elif ser.dtype == object:
+            codes, uniques = pd.factorize(ser)
+            np.save(path / f'{i}.npy', codes.astype(np.int32))
+            with open(path / f'{i}.pkl', 'wb') as file:
+                pickle.dump(np.asarray(uniques, dtype=object), file)
+            columns.append({'name': name, 'kind': 'object'})
+
+        else:
+            np.save(path / f'{i}.npy', ser.to_numpy())
+            columns.append({'name': name, 'kind': 'array'})
+
+    meta = {'version': FORMAT_VERSION, 'n_rows': len(df), 'columns': columns}
+    with open(path / 'meta.json', 'w') as file:
+        json.dump(meta, file, indent=2)
+
+def read_columnar(path, columns=None, mmap=True):
+    """
+    Read a DataFrame written by write_columnar.
+
+    Parameters:
+        path (str or Path): The directory to read.
+        columns (list, optional): The columns to read. If None, all columns are read.
+        mmap (bool): Whether to memory-map the arrays (copy-on-write) instead of reading them into memory.
+
+    Returns:
+        pd.DataFrame: The DataFrame with its original dtypes.
+    """
+    path = Path(path)
+    with open(path / 'meta.json') as file:
+        meta = json.load(file)
+
+    if meta['version'] != FORMAT_VERSION:
+        raise ValueError(f"Unsupported columnar format version: {meta['version']}")
+
+    schema = {col['name']: (i, col) for i, col in enumerate(meta['columns'])}
+    if columns is None:
+        columns = list(schema)
+
+    data = {}
+    for name in columns:
+        i, col = schema[name]
+        values = np.load(path / f'{i}.npy', mmap_mode='c' if mmap else None)
+
+        if col['kind'] == 'category':
+            with open(path / f'{i}.pkl', 'rb') as file:
+                categories = pickle.load(file)
+            values = pd.Categorical.from_codes(values, categories=categories, ordered=col['ordered'])
+
+        elif col['kind'] == 'object':
+            with open(path / f'{i}.pkl', 'rb') as file:
+                uniques = pickle.load(file)
+            # Code -1 marks a missing value and indexes the trailing NaN
+            lookup = np.append(uniques, np.nan)
+            values = lookup[values]
+
+        data[name] = values
+
+    return pd.DataFrame(data, columns=columns, copy=False)
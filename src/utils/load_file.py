@@ -1,14 +1,16 @@
 import pickle
 import pandas as pd
 from pathlib import Path
+from .columnar import read_columnar
 
-def load(file_name, file_type):
+def load(file_name, file_type, columns=None):
     """
     Load a file of specified type.
 
     Parameters:
         file_name (str): The name of the file to load.
-        file_type (str): The type of the file ('pkl' for pickle or 'csv' for CSV).
+        file_type (str): The type of the file ('pkl' for pickle, 'csv' for CSV or 'columnar' for the typed columnar format).
+        columns (list, optional): The columns to load for 'csv' and 'columnar' files. If None, all columns are loaded.
 
     Returns:
         loaded_object: The loaded object (model or DataFrame).
@@ -33,10 +35,17 @@ def load(file_name, file_type):
             csv_path = project_root / 'data' / file_name
             
             # Load the data frame
-            loaded_object = pd.read_csv(csv_path)
+            loaded_object = pd.read_csv(csv_path, usecols=columns)
+        
+        elif file_type == 'columnar':
+            # Construct the path to the dataset directory
+            columnar_path = project_root / 'data' / file_name
+            
+            # Memory-map the columns with their original dtypes
+            loaded_object = read_columnar(columnar_path, columns=columns)
         
         else:
-            raise ValueError("Invalid file type. Only 'pkl' and 'csv' are supported.")
+            raise ValueError("Invalid file type. Only 'pkl', 'csv' and 'columnar' are supported.")
 
         return loaded_object
     
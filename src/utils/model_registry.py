@@ -0,0 +1,122 @@
+import os
+import time
+from collections import OrderedDict
+from pathlib import Path
+from threading import Lock
+
+# Maximum number of model versions kept in memory at the same time
+MAX_MODELS = 4
+
+# In-process cache: file name -> (signature, model), ordered from least to most recently used
+_models = OrderedDict()
+_stats = {'hits': 0, 'misses': 0, 'reloads': 0, 'evictions': 0, 'last_load_seconds': 0.0}
+_lock = Lock()
+
+def model_path(file_name):
+    """
+    Get the path of a model file inside the 'models' directory.
+
+    Parameters:
+        file_name (str): The name of the model file.
+
+    Returns:
+        Path: The path to the model file.
+    """
+    # Get the path to the current script
+    current_dir = Path(__file__).resolve().parent
+
+    # Navigate to the project root directory
+    project_root = current_dir.parent.parent
+
+    return project_root / 'models' / file_name
+
+def model_signature(file_name):
+    """
+    Get the signature of a model file, used to detect when the file is rewritten.
+
+    Parameters:
+        file_name (str): The name of the model file.
+
+    Returns:
+        tuple or None: The (modification time in ns, size in bytes) of the file, or None if it does not exist.
+    """
+    try:
+        stat = os.stat(model_path(file_name))
+        return stat.st_mtime_ns, stat.st_size
+    except FileNotFoundError:
+        return None
+
+def get_model(file_name):
+    """
+    Get a model from the in-process cache, loading it from disk on a miss or when the file has changed.
+
+    Parameters:
+        file_name (str): The name of the model file (e.g., 'RandomForestRegressor.pkl').
+
+    Returns:
+        object: The loaded model, or None if it could not be loaded.
+    """
+    signature = model_signature(file_name)
+
+    with _lock:
+        cached = _models.get(file_name)
+        if cached is not None and cached[0] == signature:
+            _models.move_to_end(file_name)
+            _stats['hits'] += 1
+            return cached[1]
+
+        _stats['misses'] += 1
+        if cached is not None:
+            _stats['reloads'] += 1
+            del _models[file_name]
+
+    # Imported here, so model_signature can be used without loading pandas (e.g. by the CLI's artifact check)
+    from .load_file import load
+
+    start = time.perf_counter()
+    model = load(file_name, 'pkl')
+    load_seconds = time.perf_counter() - start
+    if model is None:
+        return None
+
+    with _lock:
+        _stats['last_load_seconds'] = load_seconds
+        _models[file_name] = (signature, model)
+        _models.move_to_end(file_name)
+
+        # Evict the least recently used models
+        while len(_models) > MAX_MODELS:
+            _models.popitem(last=False)
+            _stats['evictions'] += 1
+
+    return model
+
+def cache_stats():
+    """
+    Get the hit/miss counters of the model cache.
+
+    Parameters:
+        None
+
+    Returns:
+        dict: The cache counters and the names of the resident models.
+    """
+    with _lock:
+        stats = dict(_stats)
+        stats['resident'] = list(_models)
+    return stats
+
+def clear_cache():
+    """
+    Remove all models from the in-process cache and reset the counters.
+
+    Parameters:
+        None
+
+    Returns:
+        None
+    """
+    with _lock:
+        _models.clear()
+        for key in _stats:
+            _stats[key] = 0.0 if key == 'last_load_seconds' else 0
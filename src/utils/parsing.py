@@ -0,0 +1,24 @@
+import pandas as pd
+
+def parse_unique(series, parser):
+    """
+    Parse a low-cardinality column by parsing each distinct value once and mapping the results back.
+
+    Parameters:
+        series (pd.Series): The column to parse.
+        parser (callable): A function that parses a Series element-wise and returns a Series of the same length.
+
+    Returns:
+        pd.Series: The parsed column, aligned with the index of the input series.
+    """
+    # Dictionary-encode the column: codes index into the distinct values, -1 marks missing values
+    codes, uniques = pd.factorize(series)
+    parsed = parser(pd.Series(uniques)).reset_index(drop=True)
+
+    if (codes < 0).any():
+        # Reindexing with -1 yields missing values for missing inputs
+        result = parsed.reindex(codes)
+    else:
+        result = parsed.take(codes)
+
+    return result.set_axis(series.index).rename(series.name)
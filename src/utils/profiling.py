@@ -0,0 +1,224 @@
+import functools
+import json
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+from sklearn.base import BaseEstimator, TransformerMixin, clone
+
+# Profiling is off unless enabled here or with FLIGHT_PRICE_PROFILE=1
+_state = {'enabled': False}
+_records = []
+_stack = []
+
+def enable():
+    """
+    Start recording stage timings, row counts and peak memory (traced by tracemalloc).
+
+    Parameters:
+        None
+
+    Returns:
+        None
+    """
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+    _state['enabled'] = True
+
+def disable():
+    """
+    Stop recording stages.
+
+    Parameters:
+        None
+
+    Returns:
+        None
+    """
+    _state['enabled'] = False
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+def is_enabled():
+    """
+    Check whether stages are being recorded.
+
+    Parameters:
+        None
+
+    Returns:
+        bool: True if profiling is enabled.
+    """
+    return _state['enabled']
+
+def records():
+    """
+    Get the stages recorded so far, in completion order.
+
+    Parameters:
+        None
+
+    Returns:
+        list: One dict per stage with its name, wall and CPU seconds, rows and peak traced memory.
+    """
+    return list(_records)
+
+def reset():
+    """
+    Clear the recorded stages.
+
+    Parameters:
+        None
+
+    Returns:
+        None
+    """
+    _records.clear()
+
+@contextmanager
+def stage(name, rows=None):
+    """
+    Record the wall time, CPU time, row count and peak memory of a block when profiling is enabled.
+
+    Parameters:
+        name (str): The name of the stage.
+        rows (int, optional): The number of rows the stage processes.
+
+    Returns:
+        contextmanager: A context manager wrapping the stage.
+    """
+    if not _state['enabled']:
+        yield
+        return
+
+    # The parent's peak so far is kept before the peak counter is reset for this stage
+    current, peak = tracemalloc.get_traced_memory()
+    if _stack:
+        _stack[-1]['peak'] = max(_stack[-1]['peak'], peak)
+    tracemalloc.reset_peak()
+    frame = {'peak': 0, 'start_memory': current}
+    _stack.append(frame)
+
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    try:
+        yield
+    finally:
+        wall_seconds, cpu_seconds = time.perf_counter() - wall_start, time.process_time() - cpu_start
+        _stack.pop()
+        peak = max(frame['peak'], tracemalloc.get_traced_memory()[1])
+        if _stack:
+            _stack[-1]['peak'] = max(_stack[-1]['peak'], peak)
+
+        _records.append({
+            'stage': name,
+            'depth': len(_stack),
+            'wall_seconds': wall_seconds,
+            'cpu_seconds': cpu_seconds,
+            'rows': rows,
+            'peak_memory_mb': (peak - frame['start_memory']) / 1e6,
+        })
+
+def profiled(name):
+    """
+    Decorate a function so each call is recorded as a stage when profiling is enabled.
+
+    The row count is taken from the returned object when it has a length.
+
+    Parameters:
+        name (str): The name of the stage.
+
+    Returns:
+        callable: The decorator.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _state['enabled']:
+                return func(*args, **kwargs)
+            with stage(name):
+                result = func(*args, **kwargs)
+            _records[-1]['rows'] = len(result) if hasattr(result, '__len__') else None
+            return result
+        return wrapper
+    return decorator
+
+def write_report(path):
+    """
+    Write the recorded stages to a JSON report.
+
+    Parameters:
+        path (str or Path): The path of the JSON file to write.
+
+    Returns:
+        None
+    """
+    try:
+        with open(path, 'w') as file:
+            json.dump({'stages': _records}, file, indent=2)
+        print(f"Profiling report '{path}' saved successfully.")
+    except Exception as e:
+        print(f"An error occurred while saving the profiling report: {e}")
+
+class ProfiledTransformer(TransformerMixin, BaseEstimator):
+    """
+    Wraps a transformer so its fit and transform calls are recorded as stages.
+    """
+
+    def __init__(self, transformer, name):
+        self.transformer = transformer
+        self.name = name
+
+    def fit(self, X, y=None):
+        with stage(f'{self.name}.fit', rows=len(X)):
+            self.transformer_ = clone(self.transformer).fit(X, y)
+        return self
+
+    def fit_transform(self, X, y=None):
+        with stage(f'{self.name}.fit_transform', rows=len(X)):
+            self.transformer_ = clone(self.transformer)
+            return self.transformer_.fit_transform(X, y)
+
+    def transform(self, X):
+        with stage(f'{self.name}.transform', rows=len(X)):
+            return self.transformer_.transform(X)
+
+def instrument(column_transformer):
+    """
+    Get an unfitted copy of a ColumnTransformer whose named transformers are recorded as stages.
+
+    Parameters:
+        column_transformer (ColumnTransformer): The column transformer to instrument.
+
+    Returns:
+        ColumnTransformer: The instrumented copy.
+    """
+    instrumented = clone(column_transformer)
+    return instrumented.set_params(transformers=[
+        (name, ProfiledTransformer(transformer, f'column_transformer.{name}'), columns)
+        for name, transformer, columns in column_transformer.transformers
+    ])
+
+def strip_instrumentation(column_transformer):
+    """
+    Replace the fitted ProfiledTransformer wrappers of an instrumented ColumnTransformer by the fitted transformers.
+
+    Parameters:
+        column_transformer (ColumnTransformer): The fitted instrumented column transformer.
+
+    Returns:
+        ColumnTransformer: The same column transformer, equivalent to an uninstrumented fitted one.
+    """
+    unwrap = lambda transformer, attribute: (
+        getattr(transformer, attribute) if isinstance(transformer, ProfiledTransformer) else transformer
+    )
+    column_transformer.transformers_ = [
+        (name, unwrap(transformer, 'transformer_'), columns)
+        for name, transformer, columns in column_transformer.transformers_
+    ]
+    return column_transformer.set_params(transformers=[
+        (name, unwrap(transformer, 'transformer'), columns)
+        for name, transformer, columns in column_transformer.transformers
+    ])
+
+if os.environ.get('FLIGHT_PRICE_PROFILE') == '1':
+    enable()
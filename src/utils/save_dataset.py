@@ -1,14 +1,16 @@
 from pathlib import Path
 import pandas as pd
+from .columnar import write_columnar
 
-def save(file_name, X, y):
+def save(file_name, X, y, file_type='csv'):
     """
-    Save a DataFrame and target series to a CSV file.
+    Save a DataFrame and target series to a CSV file or a typed columnar dataset.
 
     Parameters:
         file_name (str): The name of the file to save.
         X (pd.DataFrame): The features DataFrame.
         y (pd.Series or pd.DataFrame): The target series or DataFrame.
+        file_type (str): The format to save ('csv' or 'columnar').
 
     Returns:
         None
@@ -27,8 +29,14 @@ def save(file_name, X, y):
         if isinstance(y, pd.Series):
             y = y.to_frame()
 
-        # Save the DataFrame to a CSV file
-        X.join(y).to_csv(config_file, index=False)
+        if file_type == 'csv':
+            # Save the DataFrame to a CSV file
+            X.join(y).to_csv(config_file, index=False)
+        elif file_type == 'columnar':
+            # Save the DataFrame as one binary array per column, keeping dtypes
+            write_columnar(config_file, X.join(y))
+        else:
+            raise ValueError("Invalid file type. Only 'csv' and 'columnar' are supported.")
         print(f"File '{file_name}' saved successfully.")
 
     except FileNotFoundError:
@@ -0,0 +1,262 @@
+import os
+import random
+import tempfile
+import time
+from bisect import bisect_left
+from pathlib import Path
+from threading import Lock
+from .model_registry import cache_stats, model_signature
+
+# Upper bounds of the latency (seconds) and batch size (rows) histogram buckets
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+BATCH_ROWS_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 1024, 10_000, 100_000)
+
+# Share of predict calls whose latencies are recorded; requests, rows and errors are always counted
+_config = {'sample_rate': 1.0}
+_lock = Lock()
+
+class Histogram:
+    """
+    A cumulative-bucket histogram in the Prometheus layout.
+    """
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def lines(self, name):
+        lines, cumulative = [], 0
+        for bound, count in zip(list(self.buckets) + ['+Inf'], self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{le="{bound}"}} {cumulative}')
+        lines += [f'{name}_sum {self.sum}', f'{name}_count {cumulative}']
+        return lines
+
+_histograms = {
+    'prediction_preprocess_seconds': (Histogram(LATENCY_BUCKETS), 'Time spent in the preprocessor (ColumnTransformer) per predict call.'),
+    'prediction_model_seconds': (Histogram(LATENCY_BUCKETS), 'Time spent in the model (forest) per predict call.'),
+    'prediction_seconds': (Histogram(LATENCY_BUCKETS), 'Total time per predict call.'),
+    'prediction_batch_rows': (Histogram(BATCH_ROWS_BUCKETS), 'Rows per predict call.'),
+}
+# Requests are counted by the caller (e.g. one per accepted HTTP request); predict calls and rows by observed_predict
+_counters = {'prediction_requests_total': 0, 'prediction_batches_total': 0, 'prediction_rows_total': 0}
+_errors = {}
+
+def set_sample_rate(sample_rate):
+    """
+    Set the share of predict calls whose latencies are recorded.
+
+    Parameters:
+        sample_rate (float): A share between 0 (no latencies) and 1 (every call).
+
+    Returns:
+        None
+    """
+    _config['sample_rate'] = sample_rate
+
+def record_request():
+    """
+    Count one accepted prediction request, however many predict calls it is scored in.
+
+    Parameters:
+        None
+
+    Returns:
+        None
+    """
+    with _lock:
+        _counters['prediction_requests_total'] += 1
+
+def record_error(error):
+    """
+    Count an error by its exception type.
+
+    Parameters:
+        error (Exception): The exception raised.
+
+    Returns:
+        None
+    """
+    with _lock:
+        name = type(error).__name__
+        _errors[name] = _errors.get(name, 0) + 1
+
+def _stages(predictor):
+    """
+    Split a predictor into its preprocessing and model functions.
+    """
+    if hasattr(predictor, 'transformer'):
+        # CompiledPipeline
+        return predictor.transformer.transform, predictor.model.predict
+    if hasattr(predictor, 'steps'):
+        # sklearn Pipeline
+        def preprocess(X):
+            for _, step in predictor.steps[:-1]:
+                X = step.transform(X)
+            return X
+        return preprocess, predictor.steps[-1][1].predict
+    return (lambda X: X), predictor.predict
+
+def observed_predict(predictor, X):
+    """
+    Call predictor.predict(X), counting the call (as a batch) and its rows and, for sampled calls, timing
+    preprocessing and model separately.
+
+    Errors are counted by exception type and raised again.
+
+    Parameters:
+        predictor (object): A Pipeline, a CompiledPipeline or any object with a predict(X) method.
+        X (pd.DataFrame or dict): The input columns.
+
+    Returns:
+        np.ndarray: The predicted values.
+    """
+    n_rows = len(X) if hasattr(X, 'shape') else len(next(iter(X.values())))
+    with _lock:
+        _counters['prediction_batches_total'] += 1
+        _counters['prediction_rows_total'] += n_rows
+
+    try:
+        if random.random() >= _config['sample_rate']:
+            return predictor.predict(X)
+
+        preprocess, model = _stages(predictor)
+        start = time.perf_counter()
+        design = preprocess(X)
+        preprocessed = time.perf_counter()
+        predictions = model(design)
+        end = time.perf_counter()
+    except Exception as e:
+        record_error(e)
+        raise
+
+    with _lock:
+        _histograms['prediction_preprocess_seconds'][0].observe(preprocessed - start)
+        _histograms['prediction_model_seconds'][0].observe(end - preprocessed)
+        _histograms['prediction_seconds'][0].observe(end - start)
+        _histograms['prediction_batch_rows'][0].observe(n_rows)
+    return predictions
+
+def export_text(model_file_name):
+    """
+    Export the metrics in the Prometheus text exposition format.
+
+    Parameters:
+        model_file_name (str): The served model file, whose version (modification time and size) is reported.
+
+    Returns:
+        str: The metrics.
+    """
+    signature = model_signature(model_file_name)
+    version = f'{signature[0]}-{signature[1]}' if signature else 'missing'
+
+    with _lock:
+        lines = []
+        for name, (histogram, description) in _histograms.items():
+            lines += [f'# HELP {name} {description}', f'# TYPE {name} histogram'] + histogram.lines(name)
+        for name, value in _counters.items():
+            lines += [f'# TYPE {name} counter', f'{name} {value}']
+        lines.append('# TYPE prediction_errors_total counter')
+        lines += [f'prediction_errors_total{{type="{name}"}} {count}' for name, count in sorted(_errors.items())]
+
+    lines += [
+        '# TYPE model_info gauge',
+        f'model_info{{file="{model_file_name}",version="{version}"}} 1',
+        '# TYPE model_load_seconds gauge',
+        f"model_load_seconds {cache_stats()['last_load_seconds']}",
+        '# TYPE prediction_sample_rate gauge',
+        f"prediction_sample_rate {_config['sample_rate']}",
+    ]
+    return '\n'.join(lines) + '\n'
+
+def write_metrics(path, model_file_name):
+    """
+    Write the metrics in the Prometheus text format to a file, e.g. for the node exporter textfile collector.
+
+    The metrics are written to a temporary file in the same directory, which then replaces the file,
+    so readers never see a partly written file.
+
+    Parameters:
+        path (str or Path): The path of the file to write.
+        model_file_name (str): The served model file, whose version is reported.
+
+    Returns:
+        None
+    """
+    temp_name = None
+    try:
+        path = Path(path)
+        with tempfile.NamedTemporaryFile('w', dir=path.parent, prefix=f'.{path.name}.', suffix='.tmp', delete=False) as file:
+            temp_name = file.name
+            file.write(export_text(model_file_name))
+        # Temporary files are private to the owner; the collector may run as another user
+        os.chmod(temp_name, 0o644)
+        os.replace(temp_name, path)
+    except Exception as e:
+        print(f"An error occurred while writing the metrics: {e}")
+        if temp_name is not None:
+            Path(temp_name).unlink(missing_ok=True)
+
+def _reset():
+    for name, (histogram, description) in _histograms.items():
+        _histograms[name] = (Histogram(histogram.buckets), description)
+    for name in _counters:
+        _counters[name] = 0
+    _errors.clear()
+
+def reset():
+    """
+    Reset every metric.
+
+    Parameters:
+        None
+
+    Returns:
+        None
+    """
+    with _lock:
+        _reset()
+
+def drain():
+    """
+    Get the metrics recorded so far and reset them, e.g. to ship the metrics of a worker process to its parent.
+
+    Parameters:
+        None
+
+    Returns:
+        dict: The histogram counts and sums, the counters and the error counts (see merge).
+    """
+    with _lock:
+        snapshot = {
+            'histograms': {name: (histogram.counts, histogram.sum) for name, (histogram, _) in _histograms.items()},
+            'counters': dict(_counters),
+            'errors': dict(_errors),
+        }
+        _reset()
+    return snapshot
+
+def merge(snapshot):
+    """
+    Add metrics drained from another process to this process's metrics.
+
+    Parameters:
+        snapshot (dict): The metrics returned by drain.
+
+    Returns:
+        None
+    """
+    with _lock:
+        for name, (counts, total) in snapshot['histograms'].items():
+            histogram = _histograms[name][0]
+            histogram.counts = [a + b for a, b in zip(histogram.counts, counts)]
+            histogram.sum += total
+        for name, value in snapshot['counters'].items():
+            _counters[name] += value
+        for name, count in snapshot['errors'].items():
+            _errors[name] = _errors.get(name, 0) + count
@@ -1,8 +1,74 @@
 from .save_dataset import save
 import pandas as pd
+from pathlib import Path
 from sklearn.model_selection import train_test_split
 
-def split(df, type=None):
+# Hash buckets (out of 100) of the test and validation sets, reproducing the 64/16/20 random split
+TEST_BUCKETS = 20
+VALIDATION_BUCKETS = 16
+
+# Number of cleaned rows read per chunk by hash_split_csv
+CHUNK_SIZE = 100_000
+
+# Columns holding times of day, hashed as 'HH:MM:SS'; other datetime columns are hashed as 'YYYY-MM-DD'
+TIME_COLUMNS = ['dep_time', 'arrival_time']
+
+def canonical_strings(X, columns):
+    """
+    Format the identifying columns as strings that do not depend on how the data is held in memory.
+
+    Datetime columns are formatted as 'HH:MM:SS' (times, stored on a dummy date by clean_df(compact=True))
+    or 'YYYY-MM-DD' (dates), and columns are sorted by name.
+
+    Parameters:
+        X (pd.DataFrame): The cleaned data.
+        columns (list): The identifying columns.
+
+    Returns:
+        pd.DataFrame: One string column per identifying column, aligned with X.
+    """
+    canonical = {}
+    for col in sorted(columns):
+        values = X[col]
+        if pd.api.types.is_datetime64_any_dtype(values):
+            values = values.dt.strftime('%H:%M:%S' if col in TIME_COLUMNS else '%Y-%m-%d')
+        canonical[col] = values.astype(str)
+    return pd.DataFrame(canonical, index=X.index)
+
+def hash_buckets(X, columns=None):
+    """
+    Assign each row to a bucket in [0, 100) by a stable hash of its identifying columns.
+
+    Values are hashed in the canonical string form of canonical_strings, so a row gets the same bucket
+    whether it is read from the cleaned CSV or comes from clean_df (with or without compact dtypes),
+    and whatever rows surround it.
+
+    Parameters:
+        X (pd.DataFrame): The cleaned data.
+        columns (list, optional): The identifying columns. If None, every column except 'price' is used.
+
+    Returns:
+        np.ndarray: The bucket of each row.
+    """
+    columns = columns or [col for col in X.columns if col != 'price']
+    hashes = pd.util.hash_pandas_object(canonical_strings(X, columns), index=False).to_numpy()
+    return hashes % 100
+
+def hash_assignments(X, columns=None):
+    """
+    Assign each row to 'train', 'validation' or 'test' by its hash bucket.
+
+    Parameters:
+        X (pd.DataFrame): The cleaned data.
+        columns (list, optional): The identifying columns. If None, every column except 'price' is used.
+
+    Returns:
+        pd.Series: The split of each row, aligned with X.
+    """
+    buckets = hash_buckets(X, columns)
+    return pd.Series('train', index=X.index).mask(buckets < TEST_BUCKETS + VALIDATION_BUCKETS, 'validation').mask(buckets < TEST_BUCKETS, 'test')
+
+def split(df, type=None, method='random'):
     """
     Split the DataFrame into training, validation, and test sets.
 
@@ -10,6 +76,8 @@ def split(df, type=None):
         df (pd.DataFrame): The DataFrame to split.
         type (str, optional): The type of split to return ('train', 'validation', 'test'). 
                               If None, all splits are returned.
+        method (str): 'random' for the seeded random split, or 'hash' to assign each row by a stable hash
+                      of its identifying columns, so assignments do not change when rows are added.
 
     Returns:
         tuple: Depending on the type parameter, returns the corresponding split(s).
@@ -19,10 +87,18 @@ def split(df, type=None):
         X = df.drop(columns="price")
         y = df.price.copy()
 
-        # First split to create test set
-        X_, X_test, y_, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-        # Second split to create training and validation sets
-        X_train, X_val, y_train, y_val = train_test_split(X_, y_, test_size=0.2, random_state=42)
+        if method == 'hash':
+            assignments = hash_assignments(X)
+            X_train, y_train = X[assignments == 'train'], y[assignments == 'train']
+            X_val, y_val = X[assignments == 'validation'], y[assignments == 'validation']
+            X_test, y_test = X[assignments == 'test'], y[assignments == 'test']
+        elif method == 'random':
+            # First split to create test set
+            X_, X_test, y_, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+            # Second split to create training and validation sets
+            X_train, X_val, y_train, y_val = train_test_split(X_, y_, test_size=0.2, random_state=42)
+        else:
+            raise ValueError("Invalid split method. Only 'random' and 'hash' are supported.")
         
         if type == 'train':
             return X_train, y_train
@@ -40,28 +116,83 @@ def split(df, type=None):
         print(f"An error occurred during the split: {e}")
         return None
 
-def split_and_save(df):
+def split_and_save(df, file_type='csv', method='random'):
     """
     Split the DataFrame into training, validation, and test sets, and save them to files.
 
     Parameters:
         df (pd.DataFrame): The DataFrame to split and save.
+        file_type (str): The format to save the splits in ('csv' or 'columnar').
+        method (str): The split method ('random' or 'hash', see split).
 
     Returns:
         None
     """
     try:
         # Perform the split
-        splits = split(df)
+        splits = split(df, method=method)
         if splits is None:
             return
 
         X_train, y_train, X_val, y_val, X_test, y_test = splits
         
         # Save the splits to files
-        save('train', X_train, y_train)
-        save('validation', X_val, y_val)
-        save('test', X_test, y_test)
+        suffix = '.columnar' if file_type == 'columnar' else ''
+        save(f'train{suffix}', X_train, y_train, file_type)
+        save(f'validation{suffix}', X_val, y_val, file_type)
+        save(f'test{suffix}', X_test, y_test, file_type)
         
     except Exception as e:
         print(f"An error occurred during splitting and saving: {e}")
+
+def hash_split_csv(input_file_name, chunk_size=CHUNK_SIZE, columns=None):
+    """
+    Stream a cleaned CSV file into train.csv, validation.csv and test.csv in one pass, by hash bucket.
+
+    Memory stays at one chunk whatever the file size, and a row lands in the same file every time
+    the file is split again with more rows appended. The splits are written to temporary files that
+    replace the old ones only once the whole file is split, so a split without rows gets a header-only
+    file and an error leaves the previous splits untouched.
+
+    Parameters:
+        input_file_name (str): The name of the cleaned CSV file in the 'data' directory.
+        chunk_size (int): The number of rows read per chunk.
+        columns (list, optional): The identifying columns. If None, every column except 'price' is used.
+
+    Returns:
+        dict: The number of rows written to each split, or None if an error occurred.
+    """
+    try:
+        # Get the path to the current script
+        current_dir = Path(__file__).resolve().parent
+
+        # Navigate to the project root directory
+        project_root = current_dir.parent.parent
+
+        counts = {'train': 0, 'validation': 0, 'test': 0}
+        paths = {name: project_root / 'data' / f'{name}.csv' for name in counts}
+        temp_paths = {name: path.with_name(f'{path.name}.tmp') for name, path in paths.items()}
+        first_chunk = True
+        for chunk in pd.read_csv(project_root / 'data' / input_file_name, chunksize=chunk_size):
+            assignments = hash_assignments(chunk, columns)
+            for name in counts:
+                part = chunk[assignments == name]
+                part.to_csv(temp_paths[name], mode='w' if first_chunk else 'a', header=first_chunk, index=False)
+                counts[name] += len(part)
+            first_chunk = False
+
+        for name, path in paths.items():
+            temp_paths[name].replace(path)
+
+        print(f"File '{input_file_name}' split successfully: {counts}.")
+        return counts
+
+    except FileNotFoundError:
+        print(f"File '{input_file_name}' not found.")
+        return None
+    except Exception as e:
+        print(f"An error occurred during the hash split: {e}")
+        return None
+    finally:
+        for temp_path in temp_paths.values():
+            temp_path.unlink(missing_ok=True)
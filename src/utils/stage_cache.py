@@ -0,0 +1,153 @@
+import hashlib
+import inspect
+import json
+import pickle
+import sys
+import time
+from pathlib import Path
+
+# Get the path to the current script
+current_dir = Path(__file__).resolve().parent
+
+# Navigate to the project root directory
+PROJECT_ROOT = current_dir.parent.parent
+
+# Stage outputs are persisted under the project root
+CACHE_DIR = PROJECT_ROOT / '.cache' / 'stages'
+
+def file_hash(path):
+    """
+    Compute the SHA-256 hash of a file's content.
+
+    Parameters:
+        path (str or Path): The path of the file.
+
+    Returns:
+        str: The hex digest.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def code_hash(*objects):
+    """
+    Compute the SHA-256 hash of the source code of modules, classes or functions.
+
+    Parameters:
+        *objects: The modules, classes or functions whose code a stage depends on.
+
+    Returns:
+        str: The hex digest.
+    """
+    digest = hashlib.sha256()
+    for obj in objects:
+        digest.update(inspect.getsource(obj).encode())
+    return digest.hexdigest()
+
+def _is_project_module(module):
+    path = getattr(module, '__file__', None)
+    if path is None:
+        return False
+    path = Path(path).resolve()
+    return PROJECT_ROOT in path.parents and 'site-packages' not in path.parts
+
+def project_modules(*objects):
+    """
+    Find the project modules that modules, classes or functions depend on, directly or transitively.
+
+    A module depends on the project modules it imports and on the modules of the project classes and
+    functions it imports by name. Third-party modules are left out.
+
+    Parameters:
+        *objects: The modules, classes or functions a stage runs.
+
+    Returns:
+        list: The project modules, sorted by name, to pass to code_hash.
+    """
+    found = {}
+    pending = [obj if inspect.ismodule(obj) else sys.modules.get(obj.__module__) for obj in objects]
+    while pending:
+        module = pending.pop()
+        if module is None or module.__name__ in found or not _is_project_module(module):
+            continue
+        found[module.__name__] = module
+        for value in vars(module).values():
+            if inspect.ismodule(value):
+                pending.append(value)
+            elif inspect.isclass(value) or inspect.isfunction(value):
+                pending.append(sys.modules.get(value.__module__))
+    return [found[name] for name in sorted(found)]
+
+def fingerprint(*parts):
+    """
+    Combine the hashes and parameters a stage depends on into one fingerprint.
+
+    Parameters:
+        *parts: JSON-serializable parts (hashes, upstream fingerprints, parameters).
+
+    Returns:
+        str: The hex digest.
+    """
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=repr).encode()).hexdigest()
+
+class StageRunner:
+    """
+    Runs pipeline stages, reusing the persisted output of a stage when its fingerprint is unchanged.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR):
+        self.cache_dir = Path(cache_dir)
+        self.report = []
+
+    def run(self, name, key, func):
+        """
+        Run a stage, or load its output if a stage with the same name and fingerprint already ran.
+
+        Parameters:
+            name (str): The name of the stage.
+            key (str): The fingerprint of the stage's inputs (see fingerprint).
+            func (callable): A function without arguments computing the stage's output.
+
+        Returns:
+            object: The stage's output.
+        """
+        path = self.cache_dir / f'{name}-{key[:16]}.pkl'
+        if path.exists():
+            start = time.perf_counter()
+            try:
+                with open(path, 'rb') as file:
+                    entry = pickle.load(file)
+                seconds = time.perf_counter() - start
+                self.report.append({
+                    'stage': name, 'reused': True, 'seconds': seconds, 'saved_seconds': entry['seconds'] - seconds,
+                })
+                return entry['output']
+            except Exception as e:
+                print(f"An error occurred while loading the cached stage '{name}', recomputing it: {e}")
+
+        start = time.perf_counter()
+        output = func()
+        seconds = time.perf_counter() - start
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        with open(path, 'wb') as file:
+            pickle.dump({'output': output, 'seconds': seconds}, file)
+        self.report.append({'stage': name, 'reused': False, 'seconds': seconds, 'saved_seconds': 0.0})
+        return output
+
+    def print_report(self):
+        """
+        Print which stages were reused and the time saved.
+
+        Parameters:
+            None
+
+        Returns:
+            None
+        """
+        for entry in self.report:
+            status = 'reused' if entry['reused'] else 'computed'
+            print(f"{entry['stage']}: {status} in {entry['seconds']:.2f}s (saved {entry['saved_seconds']:.2f}s)")
+        print(f"Total time saved: {sum(entry['saved_seconds'] for entry in self.report):.2f}s")
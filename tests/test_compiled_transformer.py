@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.base import clone
+from main import convert_to_time
+from src.scripts.compiled_transformer import CompiledTransformer, compare_with_sklearn
+from src.scripts.model_training import column_transformer
+from src.utils.load_file import load
+
+SPLITS = ['train', 'validation', 'test']
+
+# part_of_day parses times without a format, which pandas warns about
+pytestmark = pytest.mark.filterwarnings('ignore::UserWarning')
+
+def load_split(name):
+    df = load(f'{name}.csv', 'csv')
+    X, y = df.drop(columns='price'), df.price
+    convert_to_time(X)
+    return X, y
+
+@pytest.fixture(scope='module')
+def fitted():
+    X_train, y_train = load_split('train')
+    return clone(column_transformer).fit(X_train, y_train)
+
+@pytest.fixture(scope='module')
+def base_row():
+    return load_split('test')[0].head(1).reset_index(drop=True)
+
+def edge_rows(base_row, **columns):
+    """
+    Copies of the base row with the given column values, one row per value.
+    """
+    n_rows = len(next(iter(columns.values())))
+    rows = pd.concat([base_row] * n_rows, ignore_index=True)
+    for col, values in columns.items():
+        rows[col] = values
+    return rows
+
+@pytest.mark.parametrize('split_name', SPLITS)
+def test_matches_sklearn_on_saved_splits(fitted, split_name):
+    X, _ = load_split(split_name)
+    assert compare_with_sklearn(fitted, X) == 0.0
+
+def test_matches_sklearn_on_unseen_categories(fitted, base_row):
+    X = edge_rows(
+        base_row,
+        airline=['Unknown Air', 'Trujet', 'Jet Airways'],
+        source=['Atlantis', 'Delhi', 'Pune'],
+        destination=['Nowhere', 'Cochin', 'Goa'],
+    )
+    assert compare_with_sklearn(fitted, X) == 0.0
+
+def test_matches_sklearn_on_midnight_times(fitted, base_row):
+    times = pd.to_datetime(['00:00:00', '00:01:00', '23:59:00', '12:00:00'], format='%H:%M:%S')
+    X = edge_rows(base_row, dep_time=times, arrival_time=times[::-1])
+    assert compare_with_sklearn(fitted, X) == 0.0
+
+def test_matches_sklearn_on_unseen_dates(fitted, base_row):
+    X = edge_rows(base_row, date_of_journey=['2018-01-01', '2019-12-31', '2024-02-29'])
+    assert compare_with_sklearn(fitted, X) == 0.0
+
+def test_matches_sklearn_on_missing_numeric_values(fitted, base_row):
+    # Missing durations and stop counts pass through both transformers as NaN;
+    # the categorical, date and time encoders reject missing values in both
+    X = edge_rows(base_row, duration_minute=[np.nan, 575.0], total_stops=[1.0, np.nan])
+    assert compare_with_sklearn(fitted, X) == 0.0
+
+def test_matches_sklearn_on_dict_input(fitted, base_row):
+    X = load_split('validation')[0]
+    compiled = CompiledTransformer.from_column_transformer(fitted)
+    columns = {col: X[col].to_numpy() for col in X.columns}
+    assert np.array_equal(compiled.transform(columns), fitted.transform(X))
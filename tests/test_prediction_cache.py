@@ -0,0 +1,50 @@
+import pandas as pd
+import pytest
+from sklearn.base import clone
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.pipeline import Pipeline
+from main import convert_to_time
+from src.scripts import prediction_cache
+from src.scripts.model_training import column_transformer
+from src.utils.load_file import load
+
+# part_of_day parses times without a format, which pandas warns about
+pytestmark = pytest.mark.filterwarnings('ignore::UserWarning')
+
+# Not a real model file, so the cache is keyed apart from any trained model
+MODEL_NAME = 'test_prediction_cache.pkl'
+
+CLEAN_QUERY = {
+    'airline': 'Jet Airways', 'date_of_journey': '2019-05-18', 'source': 'Delhi', 'destination': 'Cochin',
+    'dep_time': '10:00', 'arrival_time': '19:00', 'duration_minute': 540, 'total_stops': 1,
+}
+
+@pytest.fixture(scope='module')
+def model():
+    df = load('train.csv', 'csv')
+    X, y = df.drop(columns='price'), df.price
+    convert_to_time(X)
+    return Pipeline(steps=[
+        ('preprocessor', clone(column_transformer)),
+        ('RF', RandomForestRegressor(n_estimators=10, random_state=42)),
+    ]).fit(X, y)
+
+@pytest.fixture
+def cache(model, monkeypatch):
+    monkeypatch.setattr(prediction_cache, 'get_predictor', lambda engine, model_name: model)
+    prediction_cache.clear_cache()
+    yield prediction_cache
+    prediction_cache.clear_cache()
+
+def test_padded_query_does_not_poison_clean_query(cache, model):
+    padded = pd.DataFrame([{**CLEAN_QUERY, 'airline': ' Jet Airways', 'source': 'Delhi ', 'total_stops': '1'}])
+    clean = pd.DataFrame([CLEAN_QUERY])
+    expected = model.predict(clean)[0]
+
+    assert cache.predict_cached(padded, model_name=MODEL_NAME)[0] == expected
+    assert cache.predict_cached(clean, model_name=MODEL_NAME)[0] == expected
+    assert cache.cache_stats()['hits'] == 1
+
+def test_non_integral_stops_are_rejected(cache):
+    with pytest.raises(ValueError):
+        cache.predict_cached(pd.DataFrame([{**CLEAN_QUERY, 'total_stops': 1.5}]), model_name=MODEL_NAME)